@@ -0,0 +1,143 @@
+"""Offline processing of exported Practicum API responses.
+
+Usage:
+    python batch.py DUMPS_DIR OUTPUT [--workers N] [--scaling]
+"""
+import argparse
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from practicum import check_response, parse_status
+
+BATCH_SIZE = 64  # dumps sent to a worker at once
+WRITE_BATCH = 10000  # records buffered before writing to the output
+
+
+def iter_dumps(directory: str):
+    """Yield paths of JSON dumps in the directory one by one."""
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if entry.is_file() and entry.name.endswith('.json'):
+                yield entry.path
+
+
+def process_dump(path: str):
+    """Derive notification records from a single dump."""
+    dump = os.path.basename(path)
+    try:
+        with open(path, encoding='utf-8') as file:
+            response = json.load(file)
+        homework_list = check_response(response)
+    except (OSError, ValueError, TypeError) as error:
+        return [{'dump': dump, 'error': repr(error)}]
+    records = []
+    for homework in homework_list:
+        if not isinstance(homework, dict):
+            records.append({
+                'dump': dump,
+                'error': repr(TypeError(
+                    f'Запись домашней работы типа {type(homework)}'
+                )),
+            })
+            continue
+        record = {
+            'dump': dump,
+            'homework_name': homework.get('homework_name'),
+            'status': homework.get('status'),
+            'date_updated': homework.get('date_updated'),
+        }
+        try:
+            record['message'] = parse_status(homework)
+        except KeyError as error:
+            record['error'] = repr(error)
+        records.append(record)
+    return records
+
+
+def process_batch(paths: list):
+    """Process several dumps and return their records as JSON lines."""
+    return [
+        json.dumps(record, ensure_ascii=False) + '\n'
+        for path in paths
+        for record in process_dump(path)
+    ]
+
+
+def iter_batches(paths, size: int = BATCH_SIZE):
+    """Split an iterable of paths into lists of the given size."""
+    paths = iter(paths)
+    batch = list(islice(paths, size))
+    while batch:
+        yield batch
+        batch = list(islice(paths, size))
+
+
+def run(directory: str, output: str, workers: int = None):
+    """Process all dumps in the directory and write records to output.
+
+    Return the number of written records and elapsed time in seconds.
+    """
+    workers = workers or os.cpu_count()
+    started = time.perf_counter()
+    written = 0
+    buffer = []
+    in_flight = deque()
+    with ProcessPoolExecutor(workers) as executor, \
+            open(output, 'w', encoding='utf-8') as out:
+        for batch in iter_batches(iter_dumps(directory)):
+            in_flight.append(executor.submit(process_batch, batch))
+            if len(in_flight) < workers * 2:
+                continue
+            buffer.extend(in_flight.popleft().result())
+            if len(buffer) >= WRITE_BATCH:
+                out.writelines(buffer)
+                written += len(buffer)
+                buffer.clear()
+        while in_flight:
+            buffer.extend(in_flight.popleft().result())
+        out.writelines(buffer)
+        written += len(buffer)
+    return written, time.perf_counter() - started
+
+
+def report_scaling(directory: str, output: str, max_workers: int):
+    """Measure records per second for a growing number of workers."""
+    workers = 1
+    baseline = None
+    while True:
+        records, elapsed = run(directory, output, workers)
+        rate = records / elapsed if elapsed else 0.0
+        baseline = baseline or rate
+        speedup = rate / baseline if baseline else 0.0
+        print(f'workers={workers} records={records} '
+              f'time={elapsed:.3f}s rate={rate:.0f}/s '
+              f'speedup={speedup:.2f}x')
+        if workers >= max_workers:
+            break
+        workers = min(workers * 2, max_workers)
+
+
+def main():
+    """Batch mode entry point."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('directory', help='каталог с JSON-дампами ответов')
+    parser.add_argument('output', help='файл для результатов (JSON lines)')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(),
+                        help='количество процессов')
+    parser.add_argument('--scaling', action='store_true',
+                        help='замерить скорость для 1..N процессов')
+    args = parser.parse_args()
+    if args.scaling:
+        report_scaling(args.directory, args.output, args.workers)
+        return
+    records, elapsed = run(args.directory, args.output, args.workers)
+    rate = records / elapsed if elapsed else 0.0
+    print(f'records={records} time={elapsed:.3f}s rate={rate:.0f}/s')
+
+
+if __name__ == '__main__':
+    main()
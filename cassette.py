@@ -0,0 +1,277 @@
+"""Record and replay of Practicum API and Telegram traffic.
+
+Usage:
+    python cassette.py CASSETTE [--speed N]
+
+Replays a cassette recorded with CASSETTE_RECORD=path through the bot
+poll cycle and reports timings.
+"""
+import argparse
+import gzip
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import deque
+
+from clock import SystemClock
+from loggers import logger
+
+API = 'api'
+SEND = 'send'
+POLL = 'poll'  # traffic of the poll loop and its notifications
+COMMAND = 'command'  # traffic caused by bot commands
+REDACTED = '<REDACTED>'
+
+
+def redact(value, secrets):
+    """Replace every secret inside nested data with a placeholder."""
+    if isinstance(value, str):
+        for secret in secrets:
+            value = value.replace(secret, REDACTED)
+        return value
+    if isinstance(value, dict):
+        return {key: redact(item, secrets) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [redact(item, secrets) for item in value]
+    return value
+
+
+class CassetteRecorder:
+    """Write API answers and sent messages with timings to a cassette.
+
+    A cassette is a gzipped file with a compact JSON entry per line:
+    kind, source, start offset and duration of the call in seconds,
+    arguments and either the result or the error. Calls made inside
+    handlers wrapped with command() have the command source, the rest
+    belongs to the poll loop. Every entry is flushed, so a killed
+    process leaves a readable cassette.
+    """
+
+    def __init__(self, path: str, secrets=()):
+        """Open the cassette for writing, secrets are never saved."""
+        self.file = gzip.open(path, 'wt', encoding='utf-8')
+        self.secrets = [str(secret) for secret in secrets if secret]
+        self.started = time.monotonic()
+        self.lock = threading.Lock()  # sends come from sink threads
+        self.local = threading.local()  # source of calls in each thread
+
+    def write(self, kind: str, started: float, args: dict,
+              result=None, error: Exception = None):
+        """Save a single call."""
+        entry = {
+            'k': kind,
+            's': getattr(self.local, 'source', POLL),
+            't': round(started - self.started, 6),
+            'd': round(time.monotonic() - started, 6),
+            'a': args,
+        }
+        if error is not None:
+            entry['e'] = repr(error)
+        else:
+            entry['r'] = result
+        line = json.dumps(
+            redact(entry, self.secrets),
+            ensure_ascii=False, separators=(',', ':'),
+        )
+        with self.lock:
+            self.file.write(line + '\n')
+            self.file.flush()
+
+    def wrap_api(self, get_api_answer):
+        """Return get_api_answer that records every call."""
+        def recorded(last_timestamp):
+            started = time.monotonic()
+            args = {'from_date': last_timestamp}
+            try:
+                result = get_api_answer(last_timestamp)
+            except Exception as error:
+                self.write(API, started, args, error=error)
+                raise
+            self.write(API, started, args, result=result)
+            return result
+        return recorded
+
+    def wrap_bot(self, bot):
+        """Return a bot proxy that records sent messages."""
+        return RecordingBot(bot, self)
+
+    def command(self, handler):
+        """Return a command handler whose calls are tagged as command."""
+        def recorded(update, context):
+            self.local.source = COMMAND
+            try:
+                return handler(update, context)
+            finally:
+                self.local.source = POLL
+        return recorded
+
+    def close(self):
+        """Flush and close the cassette."""
+        with self.lock:
+            self.file.close()
+
+
+class RecordingBot:
+    """Bot proxy recording send_message calls."""
+
+    def __init__(self, bot, recorder: CassetteRecorder):
+        """Wrap the bot."""
+        self.bot = bot
+        self.recorder = recorder
+
+    def __getattr__(self, name):
+        """Pass other attributes through to the real bot."""
+        return getattr(self.bot, name)
+
+    def send_message(self, chat_id=None, text=None, **kwargs):
+        """Send the message and record the call."""
+        started = time.monotonic()
+        args = {'chat_id': chat_id, 'text': text}
+        try:
+            message = self.bot.send_message(
+                chat_id=chat_id, text=text, **kwargs
+            )
+        except Exception as error:
+            self.recorder.write(SEND, started, args, error=error)
+            raise
+        self.recorder.write(SEND, started, args)
+        return message
+
+
+class CassettePlayer:
+    """Serve recorded traffic instead of the API and Telegram.
+
+    Only the poll loop traffic is served. Every call takes the recorded
+    time divided by speed, speed 0 skips the waits completely.
+    """
+
+    def __init__(self, path: str, speed: float = 1.0, clock=None):
+        """Load the cassette."""
+        self.speed = speed
+        self.clock = clock or SystemClock()
+        self.entries = {API: deque(), SEND: deque()}
+        self.played = {API: 0, SEND: 0}
+        with gzip.open(path, 'rt', encoding='utf-8') as file:
+            try:
+                for line in file:
+                    entry = json.loads(line)
+                    if entry.get('s', POLL) == POLL:
+                        self.entries[entry['k']].append(entry)
+            except (EOFError, ValueError) as error:
+                # the recording process was killed before close()
+                logger.warning(f'Кассета {path} оборвана, '
+                               f'загружены записи до обрыва: {error}')
+
+    def wait(self, seconds: float):
+        """Sleep for the recorded time scaled by speed."""
+        if self.speed > 0:
+            self.clock.sleep(seconds / self.speed)
+
+    def play(self, kind: str):
+        """Take the next entry of the kind and reproduce its outcome."""
+        try:
+            entry = self.entries[kind].popleft()
+        except IndexError:
+            raise EOFError(f'В кассете закончились записи {kind}.')
+        self.played[kind] += 1
+        self.wait(entry['d'])
+        if 'e' in entry:
+            raise ValueError(entry['e'])
+        return entry
+
+    def api_calls(self):
+        """Return recorded API entries in order."""
+        return list(self.entries[API])
+
+    def get_api_answer(self, last_timestamp: int):
+        """Return the next recorded API answer."""
+        return self.play(API)['r']
+
+    def send_message(self, chat_id=None, text=None, **kwargs):
+        """Reproduce the next recorded send."""
+        self.play(SEND)
+
+
+def replay(path: str, speed: float = 1.0):
+    """Run the recorded API answers through the bot and time cycles.
+
+    The gaps between recorded polls are kept, scaled by speed. The
+    cursor starts where the first recorded poll left it.
+    """
+    import homework
+    from events import SPILL, CallbackSink, EventBus
+    from history import StatusHistory
+    from stats import TransitionStore
+
+    player = CassettePlayer(path, speed)
+    workdir = tempfile.TemporaryDirectory()
+    events = EventBus()  # only telegram, served by the player
+    events.add(CallbackSink('telegram', homework.notify),
+               maxsize=homework.SINK_QUEUE_SIZE, policy=SPILL,
+               spill_path=os.path.join(workdir.name, homework.SPILL_NAME))
+    replacements = {
+        'get_api_answer': player.get_api_answer,
+        'BOT': player,
+        'HISTORY': StatusHistory(
+            os.path.join(workdir.name, homework.HISTORY_NAME)
+        ),
+        'STATS': TransitionStore(),
+        'EVENTS': events,
+    }
+    originals = {name: getattr(homework, name) for name in replacements}
+    for name, value in replacements.items():
+        setattr(homework, name, value)
+    cycles = []
+    calls = player.api_calls()
+    from_date = calls[0]['a']['from_date'] if calls else 0
+    state = {
+        'last_timestamp': from_date + homework.CURSOR_OVERLAP
+        if from_date else 0,
+    }
+    try:
+        started = time.monotonic()
+        for entry in calls:
+            if speed > 0:
+                delay = started + entry['t'] / speed - time.monotonic()
+                player.clock.sleep(max(delay, 0))
+            cycle_started = time.monotonic()
+            try:
+                homework.check_updates(state)
+            except Exception as error:
+                logger.debug(f'Записанный сбой: {error}')
+            cycles.append(time.monotonic() - cycle_started)
+        events.close()
+        elapsed = time.monotonic() - started
+    finally:
+        for name, value in originals.items():
+            setattr(homework, name, value)
+        workdir.cleanup()
+    cycles.sort()
+    return {
+        'cycles': len(cycles),
+        'sends': player.played[SEND],
+        'elapsed': elapsed,
+        'cycle_p50': cycles[len(cycles) // 2] if cycles else 0.0,
+        'cycle_max': cycles[-1] if cycles else 0.0,
+    }
+
+
+def main():
+    """Replay mode entry point."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('cassette', help='файл кассеты')
+    parser.add_argument('--speed', type=float, default=1.0,
+                        help='ускорение воспроизведения, 0 - без пауз')
+    args = parser.parse_args()
+    result = replay(args.cassette, args.speed)
+    print(' '.join(
+        f'{key}={value:.6f}' if isinstance(value, float)
+        else f'{key}={value}'
+        for key, value in result.items()
+    ))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,31 @@
+import json
+import os
+
+from loggers import logger
+
+
+def load_checkpoint(path: str):
+    """Read the saved bot state, return an empty dict if there is none."""
+    try:
+        with open(path, encoding='utf-8') as file:
+            state = json.load(file)
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as error:
+        logger.error(f'Не удалось прочитать контрольную точку '
+                     f'{path}: {error}')
+        return {}
+    if not isinstance(state, dict):
+        logger.error(f'Неверный формат контрольной точки {path}.')
+        return {}
+    return state
+
+
+def save_checkpoint(path: str, state: dict):
+    """Atomically replace the saved bot state with the given one."""
+    temp_path = f'{path}.tmp'
+    with open(temp_path, 'w', encoding='utf-8') as file:
+        json.dump(state, file)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temp_path, path)
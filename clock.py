@@ -0,0 +1,114 @@
+import heapq
+import select
+import socket
+import time
+from itertools import count
+
+
+class SystemClock:
+    """Wall clock. A sleep can be interrupted with wake().
+
+    Wake-ups are bytes sent through a socket pair rather than a
+    threading.Event, so wake() takes no locks and is safe to call from
+    a signal handler interrupting sleep() in the same thread.
+    """
+
+    def __init__(self):
+        """Create a clock with a wake-up channel."""
+        self._reader, self._writer = socket.socketpair()
+        self._reader.setblocking(False)
+        self._writer.setblocking(False)
+
+    def time(self):
+        """Return current unix time."""
+        return time.time()
+
+    def _woken(self, seconds: float = 0):
+        """Wait up to the given time, return True if wake() was called."""
+        ready, _, _ = select.select([self._reader], [], [], max(seconds, 0))
+        return bool(ready)
+
+    def _clear(self):
+        """Forget wake-ups that have already been received."""
+        try:
+            while self._reader.recv(4096):
+                pass
+        except BlockingIOError:
+            pass
+
+    def sleep(self, seconds: float):
+        """Block for the given time or until wake() is called."""
+        self._woken(seconds)
+        self._clear()
+
+    def wake(self):
+        """Interrupt the current sleep."""
+        try:
+            self._writer.send(b'\0')
+        except BlockingIOError:
+            pass  # the channel is full, a wake-up is pending anyway
+
+
+class SimulatedClock:
+    """Clock that moves forward only when somebody sleeps."""
+
+    def __init__(self, start: float = 0.0):
+        """Create a clock showing the given unix time."""
+        self.now = start
+
+    def time(self):
+        """Return current simulated time."""
+        return self.now
+
+    def sleep(self, seconds: float):
+        """Jump forward by the given time without blocking."""
+        self.now += max(seconds, 0.0)
+
+    def wake(self):
+        """Nothing to interrupt, sleeps are instant."""
+
+
+class Scheduler:
+    """Run periodic jobs using the given clock."""
+
+    def __init__(self, clock):
+        """Create an empty scheduler."""
+        self.clock = clock
+        self.jobs = []  # heap of (due time, order, interval, job, args)
+        self.running = False
+        self._order = count()
+
+    def every(self, interval: float, job, *args, start: float = None):
+        """Run job(*args) each interval seconds, first time at start."""
+        due = self.clock.time() if start is None else start
+        heapq.heappush(
+            self.jobs, (due, next(self._order), interval, job, args)
+        )
+
+    def stop(self):
+        """Finish run() after the job in progress."""
+        self.running = False
+        self.clock.wake()
+
+    def run(self, until: float = None):
+        """Run jobs in order of their due time until stopped.
+
+        If until is given, return once all jobs due before it are done.
+        Missed runs of a job that took too long are skipped.
+        """
+        self.running = True
+        while self.running and self.jobs:
+            due, order, interval, job, args = self.jobs[0]
+            if until is not None and due > until:
+                break
+            delay = due - self.clock.time()
+            if delay > 0:
+                self.clock.sleep(delay)
+                continue
+            heapq.heapreplace(
+                self.jobs,
+                (max(due + interval, self.clock.time()),
+                 order, interval, job, args)
+            )
+            job(*args)
+        self.running = False
@@ -0,0 +1,339 @@
+import json
+import os
+import queue
+import threading
+import time
+from collections import deque
+
+import requests
+
+from loggers import logger
+
+DROP_NEW = 'drop_new'  # discard the event that does not fit
+DROP_OLDEST = 'drop_oldest'  # discard the oldest queued event
+SPILL = 'spill'  # save the event to a file and deliver it later
+LATENCY_WINDOW = 1000  # latest deliveries used for latency metrics
+SPILL_CHECK = 1.0  # in seconds, idle time before delivering spilled events
+SPILL_RETRY = 30  # in seconds, pause after a failed delivery of spilled ones
+WEBHOOK_TIMEOUT = 10  # in seconds
+
+_STOP = object()  # queue item that finishes a worker
+
+
+class Sink:
+    """Consumer of status change events."""
+
+    name = 'sink'
+
+    def handle(self, event: dict):
+        """Deliver a single event."""
+        raise NotImplementedError
+
+
+class CallbackSink(Sink):
+    """Sink that passes events to a function."""
+
+    def __init__(self, name: str, callback):
+        """Create a sink calling callback(event)."""
+        self.name = name
+        self.callback = callback
+
+    def handle(self, event: dict):
+        """Call the function with the event."""
+        self.callback(event)
+
+
+class FileSink(Sink):
+    """Sink that appends events to a JSON lines file."""
+
+    name = 'file'
+
+    def __init__(self, path: str):
+        """Create a sink writing to the given path."""
+        self.path = path
+
+    def handle(self, event: dict):
+        """Append the event to the file."""
+        with open(self.path, 'a', encoding='utf-8') as file:
+            file.write(json.dumps(event, ensure_ascii=False) + '\n')
+
+
+class WebhookSink(Sink):
+    """Sink that posts events as JSON to an HTTP endpoint."""
+
+    name = 'webhook'
+
+    def __init__(self, url: str, timeout: float = WEBHOOK_TIMEOUT):
+        """Create a sink posting to the given URL."""
+        self.url = url
+        self.timeout = timeout
+
+    def handle(self, event: dict):
+        """Post the event, raise on unsuccessful response."""
+        response = requests.post(self.url, json=event, timeout=self.timeout)
+        response.raise_for_status()
+
+
+class SinkWorker:
+    """Bounded queue and a thread delivering events to one sink.
+
+    With the spill policy events that do not fit into the queue or could
+    not be delivered are saved to a file and retried later. While the
+    file exists new events are appended to it too, so the sink receives
+    events in the order they were published.
+    """
+
+    def __init__(self, sink: Sink, maxsize: int = 100,
+                 policy: str = DROP_OLDEST, spill_path: str = None):
+        """Start a worker thread for the sink."""
+        if policy == SPILL and spill_path is None:
+            raise ValueError('Для политики spill нужен путь к файлу.')
+        self.sink = sink
+        self.policy = policy
+        self.spill_path = spill_path
+        self.queue = queue.Queue(maxsize)
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+        self.counters = {
+            'delivered': 0, 'failed': 0, 'dropped': 0, 'spilled': 0,
+        }
+        self._spill_lock = threading.Lock()
+        # events saved by a previous run are delivered before new ones
+        self.backlog = policy == SPILL and os.path.exists(spill_path)
+        self.unspilled = deque()  # taken from the file, not delivered yet
+        self.delivering = None  # queued event passed to the sink now
+        self.retry_at = 0.0
+        self.closing = False
+        self.abandoned = False  # join() timed out and saved the rest
+        self.thread = threading.Thread(
+            target=self.run, name=f'sink-{sink.name}', daemon=True
+        )
+        self.thread.start()
+
+    def put(self, event: dict):
+        """Queue the event without blocking, apply policy when full."""
+        item = (time.monotonic(), event)
+        if self.policy == SPILL:
+            self.spill(item)
+            return
+        try:
+            self.queue.put_nowait(item)
+            return
+        except queue.Full:
+            pass
+        self.counters['dropped'] += 1
+        if self.policy == DROP_OLDEST:
+            try:
+                self.queue.get_nowait()
+                self.queue.put_nowait(item)
+            except (queue.Empty, queue.Full):
+                pass
+
+    def spill(self, item):
+        """Queue the event, save it to the file if the queue is full."""
+        published, event = item
+        with self._spill_lock:
+            if not self.backlog:
+                try:
+                    self.queue.put_nowait(item)
+                    return
+                except queue.Full:
+                    self.backlog = True
+            with open(self.spill_path, 'a', encoding='utf-8') as file:
+                file.write(json.dumps([published, event]) + '\n')
+        self.counters['spilled'] += 1
+
+    def respill(self, items):
+        """Save undelivered events in front of the spilled ones.
+
+        Must be called with the spill lock held.
+        """
+        lines = []
+        if os.path.exists(self.spill_path):
+            with open(self.spill_path, encoding='utf-8') as file:
+                lines = file.readlines()
+        temp_path = f'{self.spill_path}.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as file:
+            for published, event in items:
+                file.write(json.dumps([published, event]) + '\n')
+            file.writelines(lines)
+        os.replace(temp_path, self.spill_path)
+        self.backlog = True
+        self.counters['spilled'] += len(items)
+
+    def drain(self):
+        """Take all queued events out of the queue."""
+        items = []
+        while True:
+            try:
+                item = self.queue.get_nowait()
+            except queue.Empty:
+                return items
+            if item is not _STOP:
+                items.append(item)
+
+    def unspill(self):
+        """Deliver events saved to the spill file in order.
+
+        On a failure the rest stays in the file until SPILL_RETRY passes.
+        """
+        while True:
+            with self._spill_lock:
+                if self.abandoned:
+                    return
+                if not os.path.exists(self.spill_path):
+                    self.backlog = False
+                    return
+                with open(self.spill_path, encoding='utf-8') as file:
+                    self.unspilled.extend(
+                        json.loads(line) for line in file if line.strip()
+                    )
+                os.remove(self.spill_path)
+            while self.unspilled:
+                try:
+                    published, event = self.unspilled[0]
+                except IndexError:
+                    return  # join() has saved them back to the file
+                if not self.deliver(published, event):
+                    self.retry_at = time.monotonic() + SPILL_RETRY
+                    with self._spill_lock:
+                        if self.unspilled:
+                            self.respill(self.unspilled)
+                            self.unspilled.clear()
+                    return
+                with self._spill_lock:
+                    if self.unspilled:
+                        self.unspilled.popleft()
+
+    def deliver(self, published: float, event: dict):
+        """Pass an event to the sink, return True on success."""
+        try:
+            self.sink.handle(event)
+        except Exception as error:
+            self.counters['failed'] += 1
+            logger.error(f'Обработчик событий {self.sink.name} '
+                         f'не смог обработать событие: {error}')
+            delivered = False
+        else:
+            self.counters['delivered'] += 1
+            delivered = True
+        self.latencies.append(time.monotonic() - published)
+        return delivered
+
+    def process(self, item):
+        """Deliver a queued event, keep it for later if that fails."""
+        self.delivering = item
+        delivered = self.deliver(*item)
+        self.delivering = None
+        if delivered or self.policy != SPILL:
+            return
+        # the failed event and the ones queued after it keep their order
+        with self._spill_lock:
+            if not self.abandoned:
+                self.respill([item] + self.drain())
+        self.retry_at = time.monotonic() + SPILL_RETRY
+
+    def run(self):
+        """Thread target: deliver queued events until stopped."""
+        while True:
+            try:
+                item = self.queue.get(timeout=SPILL_CHECK)
+            except queue.Empty:
+                if self.closing:
+                    break
+                if self.backlog and time.monotonic() >= self.retry_at:
+                    self.unspill()
+                continue
+            if item is _STOP:
+                break
+            self.process(item)
+            if self.closing and self.queue.empty():
+                break  # stop() could not queue _STOP into a full queue
+        if self.backlog:
+            self.unspill()
+
+    def stop(self):
+        """Ask the thread to finish once queued events are delivered."""
+        self.closing = True
+        try:
+            self.queue.put_nowait(_STOP)
+        except queue.Full:
+            pass  # the thread stops when it finds the queue empty
+
+    def join(self, deadline: float = None):
+        """Wait for the thread until the time.monotonic() deadline.
+
+        Events left undelivered by then are dropped, or saved to the
+        spill file with the spill policy. The event being delivered is
+        saved as well, so it may be sent twice but is never lost.
+        """
+        timeout = None
+        if deadline is not None:
+            timeout = max(deadline - time.monotonic(), 0)
+        self.thread.join(timeout)
+        if not self.thread.is_alive():
+            return
+        logger.error(f'Обработчик событий {self.sink.name} '
+                     f'не успел обработать очередь.')
+        if self.policy != SPILL:
+            return
+        with self._spill_lock:
+            self.abandoned = True
+            items = list(self.unspilled) + self.drain()
+            if self.delivering is not None:
+                items.insert(0, self.delivering)
+            self.unspilled.clear()
+            if items:
+                self.respill(items)
+
+    def close(self, timeout: float = None):
+        """Deliver queued events and stop the thread."""
+        self.stop()
+        self.join(None if timeout is None else time.monotonic() + timeout)
+
+    def metrics(self):
+        """Return delivery counters and latency percentiles."""
+        latencies = sorted(self.latencies)
+        metrics = dict(self.counters, queued=self.queue.qsize())
+        if latencies:
+            last = len(latencies) - 1
+            metrics.update(
+                latency_p50=latencies[last // 2],
+                latency_p95=latencies[last * 95 // 100],
+                latency_max=latencies[last],
+            )
+        return metrics
+
+
+class EventBus:
+    """Fan out events to sinks, each behind its own worker."""
+
+    def __init__(self):
+        """Create a bus without sinks."""
+        self.workers = []
+
+    def add(self, sink: Sink, **options):
+        """Attach a sink, options are passed to SinkWorker."""
+        self.workers.append(SinkWorker(sink, **options))
+
+    def publish(self, event: dict):
+        """Queue the event for every sink, never blocks."""
+        for worker in self.workers:
+            worker.put(event)
+
+    def close(self, timeout: float = None):
+        """Deliver queued events and stop all workers.
+
+        The timeout is shared by all sinks, they finish in parallel.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for worker in self.workers:
+            worker.stop()
+        for worker in self.workers:
+            worker.join(deadline)
+        self.workers = []
+
+    def metrics(self):
+        """Return metrics of every sink by its name."""
+        return {
+            worker.sink.name: worker.metrics() for worker in self.workers
+        }
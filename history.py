@@ -0,0 +1,150 @@
+import json
+import os
+import threading
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timezone
+
+from loggers import logger
+
+DATE_FORMAT = '%Y-%m-%dT%H:%M:%SZ'
+
+
+def parse_date(date_string):
+    """Convert Practicum `date_updated` string into a unix timestamp."""
+    try:
+        date = datetime.strptime(date_string, DATE_FORMAT)
+    except (TypeError, ValueError):
+        return int(time.time())
+    return int(date.replace(tzinfo=timezone.utc).timestamp())
+
+
+class StatusHistory:
+    """Append-only log of homework status transitions.
+
+    Records are stored one per line in a compact JSON file. Only file
+    offsets are kept in memory, indexed by homework name and by time,
+    so memory usage does not depend on the size of the records.
+    The index is updated by the poll loop and read by command handlers
+    in other threads, readers take a copy of it under the lock.
+    """
+
+    def __init__(self, path: str):
+        """Open the log at the given path and index its records."""
+        self.path = path
+        self.last_status = {}  # homework name -> latest known status
+        self.by_name = {}  # homework name -> array of offsets
+        self.times = array('q')  # transition timestamps, sorted
+        self.offsets = array('q')  # offsets matching self.times
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            self._load()
+
+    def __len__(self):
+        """Return the number of saved transitions."""
+        return len(self.offsets)
+
+    def __iter__(self):
+        """Yield all saved transitions in time order."""
+        with self._lock:
+            offsets = self.offsets[:]
+        return self._read(offsets)
+
+    def _load(self):
+        """Rebuild the in-memory index from the log file."""
+        with open(self.path, 'rb') as log:
+            offset = log.tell()
+            for line in iter(log.readline, b''):
+                if not line.endswith(b'\n'):
+                    break  # the last write was cut off by a kill
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    logger.error(f'Повреждённая запись в истории '
+                                 f'статусов {self.path}: {line!r}')
+                else:
+                    self._index(record, offset)
+                offset = log.tell()
+            else:
+                return
+        self._repair(line, offset)
+
+    def _repair(self, line: bytes, offset: int):
+        """Complete or cut off the unterminated last line of the log.
+
+        Otherwise the next record would be appended to the same line and
+        both would be lost on the next load.
+        """
+        try:
+            record = json.loads(line)
+        except ValueError:
+            logger.error(f'Оборванная запись в истории статусов '
+                         f'{self.path} удалена: {line!r}')
+            with open(self.path, 'r+b') as log:
+                log.truncate(offset)
+            return
+        with open(self.path, 'ab') as log:
+            log.write(b'\n')
+        self._index(record, offset)
+
+    def _index(self, record: dict, offset: int):
+        """Add a record stored at the given offset to the index."""
+        name = record['n']
+        with self._lock:
+            self.last_status[name] = record['s']
+            self.by_name.setdefault(name, array('q')).append(offset)
+            position = bisect_right(self.times, record['t'])
+            self.times.insert(position, record['t'])
+            self.offsets.insert(position, offset)
+
+    def record(self, homework: dict):
+        """Save a transition if the homework status has changed.
+
+        Return the appended record or None if nothing has changed.
+        """
+        name = homework.get('homework_name')
+        status = homework.get('status')
+        if name is None or self.last_status.get(name) == status:
+            return None
+        record = {
+            'n': name,
+            's': status,
+            't': parse_date(homework.get('date_updated')),
+        }
+        line = json.dumps(record, ensure_ascii=False, separators=(',', ':'))
+        with open(self.path, 'ab') as log:
+            offset = log.tell()
+            log.write(line.encode() + b'\n')
+        self._index(record, offset)
+        return record
+
+    def _read(self, offsets):
+        """Load records stored at the given offsets."""
+        if not offsets:
+            return  # the log file may not exist yet
+        with open(self.path, 'rb') as log:
+            for offset in offsets:
+                log.seek(offset)
+                yield json.loads(log.readline())
+
+    def for_homework(self, name: str, limit: int = 10):
+        """Return the latest transitions of a single homework."""
+        with self._lock:
+            offsets = self.by_name.get(name, array('q'))[-limit:]
+        return list(self._read(offsets))
+
+    def between(self, start: int, end: int, limit: int = 10):
+        """Return the latest transitions within [start, end] time range."""
+        with self._lock:
+            left = bisect_left(self.times, start)
+            right = bisect_right(self.times, end)
+            left = max(left, right - limit)
+            offsets = self.offsets[left:right]
+        return list(self._read(offsets))
+
+    def latest(self, limit: int = 10):
+        """Return the latest transitions of all homeworks."""
+        with self._lock:
+            offsets = self.offsets[-limit:]
+        return list(self._read(offsets))
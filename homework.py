@@ -1,6 +1,10 @@
 import logging
 import os
+from queue import Queue
 import requests
+import signal
+import socket
+from functools import partial
 from sys import exit
 import time
 from http import HTTPStatus
@@ -8,11 +12,30 @@ from http import HTTPStatus
 from dotenv import load_dotenv
 
 import telegram
-from telegram.ext import CommandHandler, Updater
-
+from telegram.ext import CommandHandler, Dispatcher, Updater
+
+from cassette import CassetteRecorder
+from checkpoint import load_checkpoint, save_checkpoint
+from clock import Scheduler, SystemClock
+from events import (DROP_OLDEST, SPILL, CallbackSink, EventBus, FileSink,
+                    WebhookSink)
+from history import StatusHistory, parse_date
+from lean import InlineUpdatesClock
+from lease import SQLiteLease
 from loggers import logger, formatter
+from memwatch import MemoryMonitor
+from practicum import (  # noqa: F401, HOMEWORK_STATUSES is re-exported
+    HOMEWORK_STATUSES, check_response, parse_status,
+)
+from resources import report_resources
+from stats import TransitionStore
+from web import serve_status
 
 LOG_NAME = 'PracticumStatusBot.log'
+HISTORY_NAME = 'PracticumStatusHistory.jsonl'
+CHECKPOINT_NAME = 'PracticumStatusBot.checkpoint.json'
+SPILL_NAME = 'PracticumStatusBot.spill.jsonl'
+LEASE_NAME = 'PracticumStatusBot.lease.sqlite'
 
 file_handler = logging.FileHandler(LOG_NAME)
 file_handler.setFormatter(formatter)
@@ -35,6 +58,27 @@ TELEGRAM_CHAT_ID = os.getenv(
     default='123896774'
 )
 
+# INFO and above skip building the per-cycle resource and sink reports
+logger.setLevel(os.getenv('LOG_LEVEL', default='DEBUG').upper())
+
+# optional consumers of status change events
+EVENT_FILE = os.getenv('EVENT_FILE')
+EVENT_WEBHOOK = os.getenv('EVENT_WEBHOOK')
+
+# record API answers and sent messages to this file for benchmarks
+CASSETTE_RECORD = os.getenv('CASSETTE_RECORD')
+
+# web dyno port, such a process only answers HTTP status requests on it
+PORT = os.getenv('PORT')
+
+# trace allocations and warn about steady memory growth
+MEMORY_MONITOR = os.getenv('MEMORY_MONITOR', default='').lower() in (
+    '1', 'true'
+)
+
+# handle commands in the main thread without updater worker threads
+LEAN_MODE = os.getenv('LEAN_MODE', default='').lower() in ('1', 'true')
+
 try:
     BOT = telegram.Bot(token=TELEGRAM_TOKEN)
 except TypeError:
@@ -48,25 +92,36 @@ RETRY_TIME = 600  # in seconds
 PRACTICUM_ENDPOINT = ('https://practicum.yandex.ru/api/'
                       'user_api/homework_statuses/')
 HEADERS = {'Authorization': f'OAuth {PRACTICUM_TOKEN}'}
-
-
-HOMEWORK_STATUSES = {
-    'approved': 'Работа проверена: ревьюеру всё понравилось. Ура!',
-    'reviewing': 'Работа взята на проверку ревьюером.',
-    'rejected': 'Работа проверена: у ревьюера есть замечания.'
-}
+HISTORY_LIMIT = 10  # transitions shown by /history
+STATS_LIMIT = 10  # projects shown by /stats
+SINK_QUEUE_SIZE = 100  # events waiting for delivery to a single sink
+SHUTDOWN_TIMEOUT = 25  # in seconds, Heroku kills the dyno after 30
+RECEIVER_TIMEOUT = 5  # in seconds, getUpdates long poll, delays stop()
+LEASE_TTL = 30  # in seconds, polling moves to another process after it
+API_TIMEOUT = 10  # in seconds, keeps a cycle shorter than LEASE_TTL
+CURSOR_OVERLAP = 60  # in seconds, re-requested before the cursor
+SEEN_LIMIT = 200  # latest processed records remembered for dedup
+CATCH_UP_CHUNK = 20  # records processed per page
+CATCH_UP_PAGES = 10  # pages processed per poll cycle
+CATCH_UP_DELAY = 1  # in seconds, pause between pages
+
+HISTORY = StatusHistory(HISTORY_NAME)
+STATS = TransitionStore()  # filled by load_history()
+EVENTS = EventBus()
+
+
+KEYBOARD = telegram.ReplyKeyboardMarkup(
+    [['/request_latest', '/history', '/stats']], resize_keyboard=True
+)
 
 
 def send_message(bot, message):
     """Send a telegram message to the chat with the given ID."""
-    button = telegram.ReplyKeyboardMarkup(
-        [['/request_latest']], resize_keyboard=True
-    )
     try:
         bot.send_message(
             chat_id=TELEGRAM_CHAT_ID,
             text=message,
-            reply_markup=button
+            reply_markup=KEYBOARD
         )
     except Exception as error:
         logger.error(f'Боту не удалось отправить сообщение. '
@@ -83,6 +138,7 @@ def get_api_answer(last_timestamp: int):
         PRACTICUM_ENDPOINT,
         headers=headers,
         params=params,
+        timeout=API_TIMEOUT,
     )
     if homework_statuses.status_code == HTTPStatus.OK:
         homework_statuses = homework_statuses.json()
@@ -94,37 +150,6 @@ def get_api_answer(last_timestamp: int):
         raise ValueError
 
 
-def check_response(response: dict):
-    """Checking if data from Yandex is correct."""
-    if not isinstance(response, dict):
-        response_type = type(response)
-        logger.error(f'Ошибка формата данных Yandex. Вместо типа dict'
-                      f'в ответе объект типа {response_type}')
-        raise TypeError
-        # checking if there is a list with 'homeworks' key
-    if not isinstance(response.get('homeworks'), list):
-        homework_type = type(response.get('homeworks'))
-        logger.error(f'Ошибка формата данных Yandex. '
-                      f'По ключу \'homeworks\' вместо типа list'
-                      f'расположен объект типа {homework_type}')
-        raise TypeError
-    return response.get('homeworks')
-
-
-def parse_status(homework: dict):
-    """Parse latest change in homework status."""
-    homework_name = homework.get('homework_name')
-    homework_status = homework.get('status')
-    try:
-        verdict = HOMEWORK_STATUSES[homework_status]
-    except KeyError as error:
-        logger.error(f'В ответе API недокументированный статус '
-                      f'домашней работы: {error}')
-        raise KeyError
-    else:
-        return f'Изменился статус проверки работы "{homework_name}". {verdict}'
-
-
 def check_tokens():
     """Checking if all the tokens required for bot are available in .env."""
     if not PRACTICUM_TOKEN:
@@ -158,9 +183,344 @@ def request_latest(update, context):
         send_message(BOT, text)
 
 
-def main():
+def format_history(records: list):
+    """Render status transitions as a message text."""
+    lines = []
+    for record in records:
+        date = time.strftime('%Y-%m-%d %H:%M', time.gmtime(record['t']))
+        lines.append(f'{date} | {record["n"]} | {record["s"]}')
+    return '\n'.join(lines)
+
+
+def history(update, context):
+    """Show saved status transitions without requesting the API."""
+    homework_name = ' '.join(context.args or [])
+    if homework_name:
+        records = HISTORY.for_homework(homework_name, HISTORY_LIMIT)
+    else:
+        records = HISTORY.latest(HISTORY_LIMIT)
+    if not records:
+        send_message(BOT, 'История статусов пуста.')
+        return
+    send_message(BOT, format_history(records))
+
+
+def format_duration(seconds: float):
+    """Render a duration in hours."""
+    return f'{seconds / 3600:.1f} ч'
+
+
+def format_stats(summary: dict):
+    """Render review turnaround statistics as a message text."""
+    cohort = summary['all']
+    percentiles = ' / '.join(
+        format_duration(value) for value in cohort['percentiles']
+    )
+    lines = [
+        f'Проверок: {cohort["reviews"]}, '
+        f'доля отказов: {cohort["rejection_rate"]:.0%}',
+        f'Время проверки (p50 / p90 / p99): {percentiles}',
+    ]
+    projects = sorted(
+        summary['projects'].items(),
+        key=lambda item: item[1]['reviews'],
+        reverse=True,
+    )
+    for name, project in projects[:STATS_LIMIT]:
+        lines.append(
+            f'{name}: проверок {project["reviews"]}, '
+            f'медиана {format_duration(project["percentiles"][0])}, '
+            f'отказов {project["rejection_rate"]:.0%}'
+        )
+    return '\n'.join(lines)
+
+
+def stats(update, context):
+    """Show review turnaround statistics without requesting the API."""
+    if not len(STATS):
+        send_message(BOT, 'Статистика пока не собрана.')
+        return
+    send_message(BOT, format_stats(STATS.summary()))
+
+
+def stop(scheduler, signum, frame):
+    """Ask the poll loop to finish after the current cycle."""
+    logger.info(f'Получен сигнал {signum}, бот завершает работу.')
+    scheduler.stop()
+
+
+def record_key(homework: dict):
+    """Return the key identifying a single status of a homework."""
+    return [
+        homework.get('homework_name'),
+        homework.get('status'),
+        homework.get('date_updated'),
+    ]
+
+
+def process_homework(homework: dict, publish: bool = True):
+    """Save a status change and publish it to the event sinks."""
+    record = HISTORY.record(homework)
+    if record is None:
+        return  # the status is already in the history, it was sent
+    STATS.append(record['n'], record['s'], record['t'])
+    if not publish:
+        return
+    try:
+        text = parse_status(homework)
+    except KeyError:
+        return  # already logged, the record must not block the cursor
+    EVENTS.publish({
+        'homework_name': homework.get('homework_name'),
+        'status': homework.get('status'),
+        'date_updated': homework.get('date_updated'),
+        'message': text,
+    })
+
+
+def fetch_updates(state: dict):
+    """Request updates since the cursor.
+
+    Records are requested with an overlap and the ones already seen are
+    skipped. Return the new records sorted by date and the API clock.
+    """
+    from_date = max(state['last_timestamp'] - CURSOR_OVERLAP, 0)
+    yandex_response = get_api_answer(from_date)
+    homework_list = check_response(yandex_response)
+    seen_keys = set(map(tuple, state.setdefault('seen', [])))
+    fresh = [
+        homework for homework in homework_list
+        if tuple(record_key(homework)) not in seen_keys
+    ]
+    if not fresh:
+        logger.info('Нет обновлений статуса '
+                    'для последней домашней работы.')
+    fresh.sort(key=lambda homework: parse_date(homework.get('date_updated')))
+    return fresh, yandex_response.get('current_date')
+
+
+def process_page(state: dict, page: list, first_run: bool):
+    """Notify about a page of records and remember them as seen.
+
+    On the first run only the newest status of the page is sent.
+    """
+    seen = state['seen']
+    for homework in page:
+        process_homework(homework, not first_run or homework is page[-1])
+        seen.append(record_key(homework))
+    del seen[:-SEEN_LIMIT]
+
+
+def check_updates(state: dict, next_page=None):
+    """Request updates since the cursor and notify about them.
+
+    The cursor in state['last_timestamp'] follows the API clock. The
+    answer is processed in pages of CATCH_UP_CHUNK records and the cursor
+    moves past each page. Before every next page next_page() is called,
+    if it returns False the rest is left for the next request. Without a
+    saved cursor the whole answer is saved to the history as one page,
+    but only the newest status is sent.
+    """
+    fresh, current_date = fetch_updates(state)
+    first_run = not state['last_timestamp']
+    size = max(len(fresh), 1) if first_run else CATCH_UP_CHUNK
+    if first_run and len(fresh) > 1:
+        logger.info(f'Курсор не сохранён: {len(fresh)} записей попадут '
+                    f'в историю, уведомление только о последней.')
+    for start in range(0, len(fresh), size):
+        if start and next_page is not None and not next_page():
+            return
+        page = fresh[start:start + size]
+        process_page(state, page, first_run)
+        state['last_timestamp'] = parse_date(page[-1].get('date_updated'))
+    if isinstance(current_date, int):
+        state['last_timestamp'] = current_date
+    else:
+        logger.error('В ответе API нет current_date, курсор не сдвинут '
+                     'дальше последней записи.')
+
+
+def notify(event: dict):
+    """Send a status change event to the telegram chat.
+
+    Unlike send_message errors are raised, so the sink worker keeps the
+    event in the spill file and sends it again later.
+    """
+    BOT.send_message(
+        chat_id=TELEGRAM_CHAT_ID,
+        text=event['message'],
+        reply_markup=KEYBOARD
+    )
+    logger.info(f'Бот отправил сообщение с текстом: {event["message"]}')
+
+
+def add_sinks(bus: EventBus):
+    """Attach telegram and configured optional sinks to the bus."""
+    bus.add(CallbackSink('telegram', notify), maxsize=SINK_QUEUE_SIZE,
+            policy=SPILL, spill_path=SPILL_NAME)
+    if EVENT_FILE:
+        bus.add(FileSink(EVENT_FILE), maxsize=SINK_QUEUE_SIZE,
+                policy=DROP_OLDEST)
+    if EVENT_WEBHOOK:
+        bus.add(WebhookSink(EVENT_WEBHOOK), maxsize=SINK_QUEUE_SIZE,
+                policy=DROP_OLDEST)
+
+
+def record_traffic(path: str):
+    """Record API answers and sent messages to a cassette."""
+    global BOT, get_api_answer
+    recorder = CassetteRecorder(
+        path, secrets=(PRACTICUM_TOKEN, TELEGRAM_TOKEN, TELEGRAM_CHAT_ID)
+    )
+    get_api_answer = recorder.wrap_api(get_api_answer)
+    BOT = recorder.wrap_bot(BOT)
+    return recorder
+
+
+def add_handlers(dispatcher, recorder: CassetteRecorder = None):
+    """Register bot command handlers."""
+    def command(handler):
+        return recorder.command(handler) if recorder else handler
+
+    dispatcher.add_handler(CommandHandler('start', command(say_hi)))
+    dispatcher.add_handler(CommandHandler(
+        'request_latest',
+        command(request_latest),
+    ))
+    dispatcher.add_handler(CommandHandler('history', command(history)))
+    dispatcher.add_handler(CommandHandler('stats', command(stats)))
+
+
+def store_checkpoint(state: dict):
+    """Save the bot state, a failed write must not stop the bot."""
+    try:
+        save_checkpoint(CHECKPOINT_NAME, state)
+    except OSError as error:
+        logger.error(f'Не удалось сохранить контрольную точку '
+                     f'{CHECKPOINT_NAME}: {error}')
+
+
+def poll_cycle(state: dict, clock, lease: SQLiteLease = None,
+               scheduler: Scheduler = None):
+    """Check updates and save the cursor.
+
+    The checkpoint is saved after every page. Paging ends after
+    CATCH_UP_PAGES pages, once the scheduler is stopped or, if a lease
+    is given, as soon as the lease is lost.
+    """
+    logger.debug(f'last_timestamp = {state["last_timestamp"]}')
+    pages = 1
+
+    def next_page():
+        """Save the finished pages and decide whether to go on."""
+        nonlocal pages
+        store_checkpoint(state)
+        if pages >= CATCH_UP_PAGES:
+            return False
+        clock.sleep(CATCH_UP_DELAY)
+        if scheduler is not None and not scheduler.running:
+            logger.info('Бот остановлен во время опроса, остальные '
+                        'записи будут обработаны после перезапуска.')
+            return False
+        if lease is not None and not lease.acquire():
+            logger.warning(f'Процесс {lease.owner} потерял аренду '
+                           f'во время опроса.')
+            return False
+        pages += 1
+        return True
+
+    try:
+        check_updates(state, next_page)
+    except Exception as error:
+        message = f'Сбой в работе программы: {error}'
+        logger.error(message)
+    else:
+        stopped_at = state.pop('stopped_at', None)
+        if stopped_at is not None:
+            logger.info(f'Опрос возобновлён через '
+                        f'{int(clock.time()) - stopped_at} с '
+                        f'после остановки.')
+    store_checkpoint(state)
+    if logger.isEnabledFor(logging.DEBUG):
+        report_resources(logger.debug)
+        logger.debug(f'Метрики обработчиков событий: {EVENTS.metrics()}')
+
+
+def lead_cycle(lease: SQLiteLease, receiver, state: dict, clock,
+               scheduler: Scheduler = None):
+    """Run a poll cycle only while holding the polling lease."""
+    if not lease.valid():
+        return
+    poll_cycle(state, clock, lease, scheduler)
+    if not lease.held:
+        receiver.stop()  # lost during the cycle, keep_lease sees no change
+
+
+def load_history():
+    """Index the saved status history and rebuild statistics from it."""
+    global HISTORY, STATS
+    HISTORY = StatusHistory(HISTORY_NAME)
+    STATS = TransitionStore()
+    for record in HISTORY:
+        STATS.append(record['n'], record['s'], record['t'])
+
+
+def keep_lease(lease: SQLiteLease, receiver, state: dict, clock,
+               scheduler: Scheduler = None):
+    """Renew the polling lease, take polling over when it is free.
+
+    The receiver of bot updates is started and stopped together with
+    polling, so only one process calls getUpdates. The new owner reloads
+    the cursor and the status history saved by the previous one.
+    """
+    was_leader = lease.held
+    if lease.acquire() == was_leader:
+        return
+    if lease.held:
+        logger.info(f'Процесс {lease.owner} начинает опрос API.')
+        state.update(load_checkpoint(CHECKPOINT_NAME))
+        load_history()
+        receiver.start_polling(poll_interval=0.0, timeout=RECEIVER_TIMEOUT)
+        lead_cycle(lease, receiver, state, clock, scheduler)  # do not wait
+    else:
+        logger.warning(f'Процесс {lease.owner} потерял аренду, '
+                       f'опрос остановлен.')
+        receiver.stop()
+
+
+def serve_web(clock):
+    """Answer HTTP status requests on PORT until stopped.
+
+    Heroku web and worker dynos do not share a filesystem, so the lease
+    cannot keep them apart: the web process never polls the API or
+    receives bot updates, this is left to the worker.
+    """
+    scheduler = Scheduler(clock)
+    signal.signal(signal.SIGTERM, partial(stop, scheduler))
+    signal.signal(signal.SIGINT, partial(stop, scheduler))
+    started = clock.time()
+    server = serve_status(int(PORT), lambda: {
+        'role': 'web',
+        'polling': False,
+        'uptime': int(clock.time() - started),
+    })
+    logger.info(f'Процесс отвечает на HTTP-запросы на порту {PORT}, '
+                f'опрос API выполняет worker.')
+    scheduler.every(RETRY_TIME, report_resources, logger.debug)
+    scheduler.run()
+    server.shutdown()
+    logger.info('Бот остановлен.')
+
+
+def main(clock=None):
     """Bot main logic."""
-    last_timestamp = 0  # initial time of the latest request
+    if PORT:
+        serve_web(clock or SystemClock())
+        return
+    # initial time of the latest request
+    state = {'last_timestamp': 0}
+    state.update(load_checkpoint(CHECKPOINT_NAME))
+    load_history()
 
     tokens_status = check_tokens()  # check tokens status
     if isinstance(tokens_status, str):
@@ -168,36 +528,50 @@ def main():
                         f'переменная окружения {tokens_status}.')
         exit()
 
-    updater = Updater(token=TELEGRAM_TOKEN)
-
-    updater.dispatcher.add_handler(CommandHandler('start', say_hi))
-    updater.dispatcher.add_handler(CommandHandler(
-        'request_latest',
-        request_latest,
-    ))
-
-    while True:
-        logger.debug('last_timestamp = ')
-        logger.debug(last_timestamp)
-        logger.debug('***WHILE LOOP***')
-        try:
-            yandex_response = get_api_answer(last_timestamp)
-            homework_list = check_response(yandex_response)
-            try:
-                text = parse_status(homework_list[0])
-            except IndexError:
-                logger.info('Нет обновлений статуса '
-                              'для последней домашней работы.')
-            else:
-                send_message(BOT, text)
-        except Exception as error:
-            message = f'Сбой в работе программы: {error}'
-            logger.error(message)
-        else:
-            last_timestamp = int(time.time())  # refresh timestamp
-        finally:
-            updater.start_polling(poll_interval=0.0)
-            time.sleep(RETRY_TIME)
+    if LEAN_MODE:
+        dispatcher = Dispatcher(BOT, Queue(), workers=1)  # never started
+        receiver = InlineUpdatesClock(BOT, dispatcher)
+        # an injected clock drives the loop, updates are then not served
+        clock = clock or receiver
+    else:
+        receiver = Updater(token=TELEGRAM_TOKEN)
+        dispatcher = receiver.dispatcher
+    recorder = record_traffic(CASSETTE_RECORD) if CASSETTE_RECORD else None
+    add_handlers(dispatcher, recorder)
+    clock = clock or SystemClock()
+    scheduler = Scheduler(clock)
+    lease = SQLiteLease(LEASE_NAME, f'{socket.gethostname()}:{os.getpid()}',
+                        ttl=LEASE_TTL, clock=clock)
+    add_sinks(EVENTS)
+
+    signal.signal(signal.SIGTERM, partial(stop, scheduler))
+    signal.signal(signal.SIGINT, partial(stop, scheduler))
+    report_resources()
+
+    scheduler.every(LEASE_TTL / 3, keep_lease,
+                    lease, receiver, state, clock, scheduler)
+    scheduler.every(RETRY_TIME, lead_cycle,
+                    lease, receiver, state, clock, scheduler,
+                    start=clock.time() + RETRY_TIME)
+    if MEMORY_MONITOR:
+        monitor = MemoryMonitor()
+        monitor.start()
+        # runs right after each poll cycle due at the same time
+        scheduler.every(RETRY_TIME, monitor.sample,
+                        start=clock.time() + RETRY_TIME)
+    scheduler.run()
+
+    deadline = time.monotonic() + SHUTDOWN_TIMEOUT
+    if lease.held:  # before the waits below, SIGKILL may cut them
+        state['stopped_at'] = int(clock.time())
+        store_checkpoint(state)
+        lease.release()
+    receiver.stop()  # waits for the long poll and handlers in progress
+    # delivers queued notifications within the rest of the time
+    EVENTS.close(max(deadline - time.monotonic(), 0))
+    if recorder is not None:
+        recorder.close()
+    logger.info('Бот остановлен, состояние сохранено.')
 
 
 if __name__ == '__main__':
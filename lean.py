@@ -0,0 +1,65 @@
+import math
+
+from telegram.error import TelegramError
+
+from clock import SystemClock
+from loggers import logger
+
+LONG_POLL_TIMEOUT = 10  # in seconds, also bounds the shutdown delay
+ERROR_DELAY = 5  # in seconds, pause after a failed getUpdates call
+
+
+class InlineUpdatesClock(SystemClock):
+    """Wall clock that serves bot commands while the poll loop sleeps.
+
+    Updates are fetched with long polling and handled by the dispatcher
+    in the calling thread, so no updater, dispatcher or job queue
+    threads are needed.
+    """
+
+    def __init__(self, bot, dispatcher):
+        """Create a clock handling updates of the bot by the dispatcher."""
+        super().__init__()
+        self.bot = bot
+        self.dispatcher = dispatcher
+        self.offset = None  # id of the next update to receive
+        self.polling = False
+
+    def start_polling(self, **kwargs):
+        """Start handling updates while sleeping, like Updater does."""
+        self.polling = True
+
+    def stop(self):
+        """Stop handling updates, sleeps become plain waits."""
+        self.polling = False
+
+    def sleep(self, seconds: float):
+        """Handle incoming updates for the given time."""
+        if not self.polling:
+            super().sleep(seconds)
+            return
+        deadline = self.time() + seconds
+        while not self._woken():
+            remaining = deadline - self.time()
+            if remaining <= 0:
+                break
+            self.process_updates(min(remaining, LONG_POLL_TIMEOUT))
+        self._clear()
+
+    def process_updates(self, timeout: float):
+        """Receive a batch of updates and handle them one by one.
+
+        Telegram takes whole seconds, a shorter timeout is rounded up so
+        the long poll never turns into a busy loop.
+        """
+        try:
+            updates = self.bot.get_updates(
+                offset=self.offset, timeout=math.ceil(timeout)
+            )
+        except TelegramError as error:
+            logger.error(f'Не удалось получить обновления бота: {error}')
+            self._woken(min(timeout, ERROR_DELAY))
+            return
+        for update in updates:
+            self.offset = update.update_id + 1
+            self.dispatcher.process_update(update)
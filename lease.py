@@ -0,0 +1,85 @@
+import sqlite3
+from contextlib import closing
+
+from clock import SystemClock
+from loggers import logger
+
+
+class SQLiteLease:
+    """Expiring lease on a named resource shared through SQLite.
+
+    Only one owner holds the lease at a time. The owner has to renew it
+    within ttl seconds, otherwise any other process may take it over.
+    """
+
+    def __init__(self, path: str, owner: str, name: str = 'polling',
+                 ttl: float = 30, clock=None):
+        """Create a lease stored in the database at the given path."""
+        self.path = path
+        self.owner = owner
+        self.name = name
+        self.ttl = ttl
+        self.clock = clock or SystemClock()
+        self.held = False
+        self.expires_at = 0.0
+        self.last_failover = None  # seconds the resource had no owner
+        with closing(self._connect()) as connection:
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS lease ('
+                'name TEXT PRIMARY KEY, owner TEXT, expires_at REAL)'
+            )
+
+    def _connect(self):
+        """Open a connection with explicit transaction control."""
+        # a locked database must not hold the caller longer than a renewal
+        return sqlite3.connect(self.path, timeout=self.ttl / 3,
+                               isolation_level=None)
+
+    def acquire(self):
+        """Take or renew the lease, return True if it is held."""
+        now = self.clock.time()
+        connection = self._connect()
+        try:
+            connection.execute('BEGIN IMMEDIATE')
+            row = connection.execute(
+                'SELECT owner, expires_at FROM lease WHERE name = ?',
+                (self.name,)
+            ).fetchone()
+            if row is not None and row[0] != self.owner and row[1] > now:
+                connection.execute('ROLLBACK')
+                self.held = False
+                return False
+            connection.execute(
+                'INSERT OR REPLACE INTO lease VALUES (?, ?, ?)',
+                (self.name, self.owner, now + self.ttl)
+            )
+            connection.execute('COMMIT')
+        except sqlite3.Error as error:
+            logger.error(f'Не удалось обновить аренду {self.name}: {error}')
+            self.held = False
+            return False
+        finally:
+            connection.close()
+        if row is not None and row[0] != self.owner:
+            self.last_failover = now - row[1]
+            logger.info(f'Аренда {self.name} перехвачена у {row[0]} '
+                        f'через {self.last_failover:.1f} с после '
+                        f'истечения.')
+        self.held = True
+        self.expires_at = now + self.ttl
+        return True
+
+    def valid(self):
+        """Return True if the lease is held and has not expired yet."""
+        return self.held and self.clock.time() < self.expires_at
+
+    def release(self):
+        """Give the lease up so another process can take it at once."""
+        if not self.held:
+            return
+        with closing(self._connect()) as connection:
+            connection.execute(
+                'DELETE FROM lease WHERE name = ? AND owner = ?',
+                (self.name, self.owner)
+            )
+        self.held = False
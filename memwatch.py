@@ -0,0 +1,113 @@
+import tracemalloc
+from collections import deque
+
+from loggers import logger
+from resources import rss_bytes
+
+GROWTH_THRESHOLD = 1024 * 1024  # in bytes per window of cycles
+WINDOW = 50  # poll cycles used to estimate the trend
+TOP_SITES = 10  # allocation sites reported on growth
+
+
+class Trend:
+    """Least squares slope over a sliding window, updated in O(1)."""
+
+    def __init__(self, window: int):
+        """Create an empty window of the given size."""
+        self.samples = deque(maxlen=window)
+        self.total = 0  # sum of samples
+        self.weighted = 0  # sum of sample index * sample
+
+    def __len__(self):
+        """Return the number of samples in the window."""
+        return len(self.samples)
+
+    def __getitem__(self, index):
+        """Return a sample by its index in the window."""
+        return self.samples[index]
+
+    def append(self, value: int):
+        """Add a sample, dropping the oldest one if the window is full."""
+        count = len(self.samples)
+        if count == self.samples.maxlen:
+            oldest = self.samples[0]
+            # indices of the remaining samples shift down by one
+            self.weighted += count * value - (self.total - oldest + value)
+            self.total += value - oldest
+        else:
+            self.weighted += count * value
+            self.total += value
+        self.samples.append(value)
+
+    def full(self):
+        """Return True if the window is filled."""
+        return len(self.samples) == self.samples.maxlen
+
+    def slope(self):
+        """Return the growth per sample."""
+        count = len(self.samples)
+        if count < 2:
+            return 0.0
+        # x are the sample indices, so their sums have closed forms
+        sum_x = count * (count - 1) / 2
+        variance = count * (count * count - 1) / 12
+        return (self.weighted - sum_x * self.total / count) / variance
+
+
+class MemoryMonitor:
+    """Watch memory of the bot between poll cycles with tracemalloc.
+
+    sample() is cheap and meant to run after every cycle. Allocation
+    snapshots are compared only when steady growth is detected.
+    """
+
+    def __init__(self, threshold: int = GROWTH_THRESHOLD,
+                 window: int = WINDOW, top: int = TOP_SITES):
+        """Create a monitor, call start() to begin tracing."""
+        self.threshold = threshold
+        self.top = top
+        self.traced = Trend(window)
+        self.rss = Trend(window)
+        self.baseline = None
+        self.leaking = False
+
+    def start(self):
+        """Begin tracing allocations and remember the baseline."""
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+        self.baseline = tracemalloc.take_snapshot()
+
+    def stop(self):
+        """Stop tracing allocations."""
+        tracemalloc.stop()
+        self.baseline = None
+
+    def growth(self):
+        """Return traced and RSS growth over the window in bytes."""
+        steps = len(self.traced) - 1
+        return self.traced.slope() * steps, self.rss.slope() * steps
+
+    def top_growth(self):
+        """Return allocation sites that grew most since the baseline."""
+        snapshot = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+        ))
+        stats = snapshot.compare_to(self.baseline, 'lineno')
+        return [stat for stat in stats if stat.size_diff > 0][:self.top]
+
+    def sample(self):
+        """Record memory after a poll cycle, warn about steady growth."""
+        self.traced.append(tracemalloc.get_traced_memory()[0])
+        self.rss.append(rss_bytes())
+        traced_growth, rss_growth = self.growth()
+        logger.debug(f'Память: tracemalloc {self.traced[-1]} Б, '
+                     f'RSS {self.rss[-1]} Б, рост за окно '
+                     f'{traced_growth:.0f} Б / {rss_growth:.0f} Б.')
+        leaking = self.traced.full() and traced_growth > self.threshold
+        if leaking and not self.leaking:
+            sites = '\n'.join(str(stat) for stat in self.top_growth())
+            logger.warning(f'Память растёт: {traced_growth:.0f} Б за '
+                           f'{len(self.traced)} циклов. '
+                           f'Места наибольшего роста:\n{sites}')
+        self.leaking = leaking
+        return leaking
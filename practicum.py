@@ -0,0 +1,38 @@
+from loggers import logger
+
+HOMEWORK_STATUSES = {
+    'approved': 'Работа проверена: ревьюеру всё понравилось. Ура!',
+    'reviewing': 'Работа взята на проверку ревьюером.',
+    'rejected': 'Работа проверена: у ревьюера есть замечания.'
+}
+
+
+def check_response(response: dict):
+    """Checking if data from Yandex is correct."""
+    if not isinstance(response, dict):
+        response_type = type(response)
+        logger.error(f'Ошибка формата данных Yandex. Вместо типа dict'
+                      f'в ответе объект типа {response_type}')
+        raise TypeError
+        # checking if there is a list with 'homeworks' key
+    if not isinstance(response.get('homeworks'), list):
+        homework_type = type(response.get('homeworks'))
+        logger.error(f'Ошибка формата данных Yandex. '
+                      f'По ключу \'homeworks\' вместо типа list'
+                      f'расположен объект типа {homework_type}')
+        raise TypeError
+    return response.get('homeworks')
+
+
+def parse_status(homework: dict):
+    """Parse latest change in homework status."""
+    homework_name = homework.get('homework_name')
+    homework_status = homework.get('status')
+    try:
+        verdict = HOMEWORK_STATUSES[homework_status]
+    except KeyError as error:
+        logger.error(f'В ответе API недокументированный статус '
+                      f'домашней работы: {error}')
+        raise KeyError
+    else:
+        return f'Изменился статус проверки работы "{homework_name}". {verdict}'
@@ -0,0 +1,25 @@
+import os
+import resource
+import sys
+import threading
+
+from loggers import logger
+
+
+def rss_bytes():
+    """Return resident set size of the current process in bytes."""
+    try:
+        with open('/proc/self/statm') as statm:
+            pages = int(statm.read().split()[1])
+    except (OSError, ValueError, IndexError):
+        # not Linux: fall back to peak RSS, macOS reports it in bytes
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == 'darwin' else peak * 1024
+    return pages * os.sysconf('SC_PAGE_SIZE')
+
+
+def report_resources(level=logger.info):
+    """Log memory and thread footprint of the bot instance."""
+    rss = rss_bytes() / 1024 / 1024
+    level(f'Ресурсы процесса: RSS {rss:.1f} МБ, '
+          f'потоков {threading.active_count()}.')
@@ -0,0 +1,169 @@
+import threading
+
+import numpy as np
+
+REVIEWING, APPROVED, REJECTED = 0, 1, 2
+STATUS_CODES = {
+    'reviewing': REVIEWING,
+    'approved': APPROVED,
+    'rejected': REJECTED,
+}
+PERCENTILES = (50, 90, 99)
+
+
+def group_order(groups, values):
+    """Return indices sorting by group, then by value within a group.
+
+    Same as np.lexsort((values, groups)), but sorts a single combined
+    int64 key, which is several times faster.
+    """
+    if not len(values):
+        return np.arange(0)
+    low = values.min()
+    span = int(values.max()) - int(low) + 1
+    key = groups.astype(np.int64) * span + (values - low)
+    return np.argsort(key)
+
+
+class TransitionStore:
+    """Columnar store of status transitions backed by NumPy arrays.
+
+    Homework names are kept once in a list, the columns hold their
+    codes, status codes and transition timestamps. Writers hold the lock
+    while they grow or fill the columns, readers take views of the
+    filled part under it; filled rows never change afterwards.
+    """
+
+    def __init__(self, capacity: int = 1024):
+        """Create an empty store with preallocated columns."""
+        self.size = 0
+        self.homeworks = np.empty(capacity, dtype=np.int32)
+        self.statuses = np.empty(capacity, dtype=np.int8)
+        self.times = np.empty(capacity, dtype=np.int64)
+        self.names = []  # homework code -> name
+        self.codes = {}  # homework name -> code
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        """Return the number of stored transitions."""
+        return self.size
+
+    def _reserve(self, extra: int):
+        """Grow the columns to fit extra transitions."""
+        needed = self.size + extra
+        capacity = len(self.times)
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= 2
+        for column in ('homeworks', 'statuses', 'times'):
+            old = getattr(self, column)
+            new = np.empty(capacity, dtype=old.dtype)
+            new[:self.size] = old[:self.size]
+            setattr(self, column, new)
+
+    def code(self, name: str):
+        """Return the code of a homework name, adding it if needed."""
+        code = self.codes.get(name)
+        if code is None:
+            code = self.codes[name] = len(self.names)
+            self.names.append(name)
+        return code
+
+    def append(self, name: str, status: str, timestamp: int):
+        """Add a single transition, unknown statuses are ignored."""
+        status = STATUS_CODES.get(status)
+        if status is None:
+            return
+        with self._lock:
+            self._reserve(1)
+            self.homeworks[self.size] = self.code(name)
+            self.statuses[self.size] = status
+            self.times[self.size] = timestamp
+            self.size += 1
+
+    def extend(self, homeworks, statuses, times):
+        """Add columns of already encoded transitions at once."""
+        count = len(times)
+        with self._lock:
+            self._reserve(count)
+            end = self.size + count
+            self.homeworks[self.size:end] = homeworks
+            self.statuses[self.size:end] = statuses
+            self.times[self.size:end] = times
+            self.size = end
+
+    def reviews(self):
+        """Return homework codes, durations and verdicts of all reviews.
+
+        A review is a `reviewing` transition followed by a verdict of
+        the same homework.
+        """
+        with self._lock:
+            homeworks = self.homeworks[:self.size]
+            statuses = self.statuses[:self.size]
+            times = self.times[:self.size]
+        order = group_order(homeworks, times)
+        homeworks = homeworks[order]
+        statuses = statuses[order]
+        times = times[order]
+        done = (
+            (homeworks[1:] == homeworks[:-1])
+            & (statuses[:-1] == REVIEWING)
+            & (statuses[1:] != REVIEWING)
+        )
+        return (
+            homeworks[1:][done],
+            (times[1:] - times[:-1])[done],
+            statuses[1:][done],
+        )
+
+    def summary(self, percentiles=PERCENTILES):
+        """Compute review turnaround percentiles and rejection rates.
+
+        Return a dict with the cohort totals under 'all' and the same
+        figures for each homework under 'projects'.
+        """
+        homeworks, durations, verdicts = self.reviews()
+        quantiles = np.asarray(percentiles) / 100
+        result = {
+            'all': {
+                'reviews': len(durations),
+                'percentiles': (
+                    np.quantile(durations, quantiles, method='lower')
+                    if len(durations) else np.zeros(len(quantiles))
+                ).tolist(),
+                'rejection_rate': (
+                    float(np.mean(verdicts == REJECTED))
+                    if len(verdicts) else 0.0
+                ),
+            },
+            'projects': {},
+        }
+        if not len(durations):
+            return result
+
+        order = group_order(homeworks, durations)
+        homeworks = homeworks[order]
+        durations = durations[order]
+        projects, starts, counts = np.unique(
+            homeworks, return_index=True, return_counts=True
+        )
+        rejected = np.bincount(
+            homeworks, weights=verdicts[order] == REJECTED,
+            minlength=len(self.names),
+        )[projects]
+        # 'lower' quantile of each sorted group, as np.quantile above
+        ranks = np.floor(np.outer(counts - 1, quantiles)).astype(np.int64)
+        project_percentiles = durations[starts[:, None] + ranks]
+
+        for code, count, rejects, values in zip(
+            projects.tolist(), counts.tolist(), (rejected / counts).tolist(),
+            project_percentiles.tolist()
+        ):
+            result['projects'][self.names[code]] = {
+                'reviews': count,
+                'percentiles': values,
+                'rejection_rate': rejects,
+            }
+        return result
@@ -19,3 +19,30 @@ def current_timestamp():
 @pytest.fixture
 def api_url():
     return 'https://practicum.yandex.ru/api/user_api/homework_statuses/'
+
+
+@pytest.fixture
+def memory_checkpoints(monkeypatch):
+    """Keep bot checkpoints in a dict, files are fsynced on every save."""
+    import homework
+
+    saved = {}
+    monkeypatch.setattr(homework, 'save_checkpoint',
+                        lambda path, state: saved.update({path: dict(state)}))
+    monkeypatch.setattr(homework, 'load_checkpoint',
+                        lambda path: dict(saved.get(path, {})))
+    return saved
+
+
+@pytest.fixture
+def status_store(monkeypatch, tmp_path):
+    """Give the bot an empty status history and statistics in tmp_path."""
+    import homework
+    from history import StatusHistory
+    from stats import TransitionStore
+
+    path = str(tmp_path / 'history.jsonl')
+    monkeypatch.setattr(homework, 'HISTORY_NAME', path)
+    monkeypatch.setattr(homework, 'HISTORY', StatusHistory(path))
+    monkeypatch.setattr(homework, 'STATS', TransitionStore())
+    return path
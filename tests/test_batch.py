@@ -0,0 +1,50 @@
+import json
+import subprocess
+import sys
+from os.path import dirname
+
+import batch
+
+
+class TestBatch:
+
+    def test_run(self, tmp_path):
+        dumps = tmp_path / 'dumps'
+        dumps.mkdir()
+        for number in range(5):
+            response = {
+                'homeworks': [
+                    {'homework_name': f'hw{number}', 'status': 'approved'},
+                    {'homework_name': f'hw{number}', 'status': 'unknown'},
+                    'hw',
+                ],
+                'current_date': number,
+            }
+            (dumps / f'{number}.json').write_text(json.dumps(response))
+        (dumps / 'broken.json').write_text('[]')
+        output = tmp_path / 'result.jsonl'
+
+        written, _ = batch.run(str(dumps), str(output), workers=2)
+
+        records = [json.loads(line) for line in output.read_text().split(
+            '\n') if line]
+        assert written == len(records) == 16
+        assert sum('message' in record for record in records) == 5, (
+            'Проверьте, что для каждого известного статуса '
+            'формируется сообщение'
+        )
+        assert sum('error' in record for record in records) == 11
+
+    def test_import_has_no_side_effects(self, tmp_path):
+        code = 'import sys, batch; print("homework" in sys.modules)'
+        result = subprocess.run(
+            [sys.executable, '-c', code], cwd=str(tmp_path),
+            env={'PYTHONPATH': dirname(batch.__file__)},
+            capture_output=True, text=True, check=True,
+        )
+        assert result.stdout.strip() == 'False', (
+            'Пакетный режим не должен импортировать модуль бота'
+        )
+        assert not list(tmp_path.iterdir()), (
+            'Импорт пакетного режима не должен создавать файлы'
+        )
@@ -0,0 +1,149 @@
+import gzip
+
+import cassette
+
+
+class MockBot:
+
+    def __init__(self):
+        self.sent = []
+
+    def send_message(self, chat_id=None, text=None, **kwargs):
+        self.sent.append(text)
+
+
+class TestCassette:
+
+    def test_record_and_replay(self, tmp_path):
+        path = str(tmp_path / 'traffic.jsonl.gz')
+        answers = iter([
+            {'homeworks': [], 'current_date': 1},
+            None,
+            {'homeworks': [{'homework_name': 'hw1', 'status': 'approved'}],
+             'current_date': 2},
+        ])
+
+        def get_api_answer(last_timestamp):
+            answer = next(answers)
+            if answer is None:
+                raise ValueError('secret-token отклонён')
+            return answer
+
+        recorder = cassette.CassetteRecorder(path, secrets=['secret-token'])
+        recorded_get = recorder.wrap_api(get_api_answer)
+        bot = recorder.wrap_bot(MockBot())
+        for last_timestamp in range(3):
+            try:
+                recorded_get(last_timestamp)
+            except ValueError:
+                pass
+        bot.send_message(chat_id=1, text='hw1 secret-token')
+        recorder.close()
+
+        with gzip.open(path, 'rt') as file:
+            content = file.read()
+        assert 'secret-token' not in content, (
+            'Проверьте, что токены не попадают в кассету'
+        )
+        assert bot.bot.sent == ['hw1 secret-token']
+
+        result = cassette.replay(path, speed=0)
+        assert result['cycles'] == 3
+        assert result['sends'] == 1, (
+            'Уведомление о hw1 должно воспроизвести записанную отправку'
+        )
+
+    def test_player(self, tmp_path):
+        path = str(tmp_path / 'traffic.jsonl.gz')
+        recorder = cassette.CassetteRecorder(path)
+        recorder.wrap_api(lambda last_timestamp: {'homeworks': []})(0)
+        recorder.close()
+
+        player = cassette.CassettePlayer(path, speed=0)
+        assert player.get_api_answer(0) == {'homeworks': []}
+        try:
+            player.get_api_answer(0)
+        except EOFError:
+            pass
+        else:
+            assert False, 'Проверьте, что пустая кассета вызывает ошибку'
+
+    def test_killed_recording(self, tmp_path):
+        path = str(tmp_path / 'traffic.jsonl.gz')
+        recorder = cassette.CassetteRecorder(path)
+        record = recorder.wrap_api(lambda last_timestamp: {'homeworks': []})
+        record(0)
+        record(1)
+        # the process is killed: the cassette is never closed
+
+        player = cassette.CassettePlayer(path, speed=0)
+        assert len(player.api_calls()) == 2, (
+            'Записи должны сохраняться до закрытия кассеты'
+        )
+
+    def test_replay_uses_private_sinks(self, monkeypatch, tmp_path):
+        import homework
+
+        path = str(tmp_path / 'traffic.jsonl.gz')
+        recorder = cassette.CassetteRecorder(path)
+        recorder.wrap_api(lambda last_timestamp: {
+            'homeworks': [{'homework_name': 'hw1', 'status': 'approved',
+                           'date_updated': '2022-02-01T10:00:00Z'}],
+            'current_date': 2,
+        })(0)
+        recorder.wrap_bot(MockBot()).send_message(chat_id=1, text='hw1')
+        recorder.close()
+        monkeypatch.setattr(homework, 'EVENT_FILE',
+                            str(tmp_path / 'events.jsonl'))
+        events = homework.EVENTS
+
+        assert cassette.replay(path, speed=0)['cycles'] == 1
+        assert homework.EVENTS is events and not events.workers, (
+            'Воспроизведение не должно трогать шину событий бота'
+        )
+        assert not (tmp_path / 'events.jsonl').exists()
+
+    def test_replay_only_poll_traffic(self, tmp_path):
+        path = str(tmp_path / 'traffic.jsonl.gz')
+        recorder = cassette.CassetteRecorder(path)
+        get_api_answer = recorder.wrap_api(lambda timestamp: {
+            'homeworks': [{'homework_name': 'hw1', 'status': 'approved',
+                           'date_updated': '2022-02-01T10:00:00Z'}],
+            'current_date': 2000,
+        })
+        bot = recorder.wrap_bot(MockBot())
+
+        def request_latest(update, context):
+            get_api_answer(1638230400)
+            bot.send_message(chat_id=1, text='hw1')
+
+        get_api_answer(1000)
+        bot.send_message(chat_id=1, text='hw1')
+        recorder.command(request_latest)(None, None)
+        recorder.close()
+
+        result = cassette.replay(path, speed=0)
+        assert result['cycles'] == 1, (
+            'Ответы API на команды не должны воспроизводиться как опрос'
+        )
+        assert result['sends'] == 1
+
+    def test_replay_continues_cursor(self, tmp_path):
+        path = str(tmp_path / 'traffic.jsonl.gz')
+        recorder = cassette.CassetteRecorder(path)
+        recorder.wrap_api(lambda timestamp: {
+            'homeworks': [
+                {'homework_name': f'hw{number}', 'status': 'approved',
+                 'date_updated': f'2022-02-01T10:0{number}:00Z'}
+                for number in range(3)
+            ],
+            'current_date': 3000,
+        })(1000)  # the cursor was saved before recording
+        bot = recorder.wrap_bot(MockBot())
+        for number in range(3):
+            bot.send_message(chat_id=1, text=f'hw{number}')
+        recorder.close()
+
+        assert cassette.replay(path, speed=0)['sends'] == 3, (
+            'Воспроизведение должно продолжать записанный курсор'
+        )
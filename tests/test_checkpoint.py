@@ -0,0 +1,35 @@
+from checkpoint import load_checkpoint, save_checkpoint
+
+
+class TestCheckpoint:
+
+    def test_roundtrip(self, tmp_path):
+        path = str(tmp_path / 'state.json')
+        assert load_checkpoint(path) == {}, (
+            'При отсутствии контрольной точки должен возвращаться пустой dict'
+        )
+        save_checkpoint(path, {'last_timestamp': 42, 'stopped_at': 43})
+        save_checkpoint(path, {'last_timestamp': 44})
+        assert load_checkpoint(path) == {'last_timestamp': 44}
+
+    def test_corrupted(self, tmp_path):
+        path = tmp_path / 'state.json'
+        path.write_text('{"last_timestamp": ')
+        assert load_checkpoint(str(path)) == {}
+        path.write_text('[1, 2]')
+        assert load_checkpoint(str(path)) == {}
+
+    def test_poll_cycle_survives_write_error(self, monkeypatch, tmp_path,
+                                             caplog):
+        import homework
+        from clock import SimulatedClock
+
+        monkeypatch.setattr(homework, 'CHECKPOINT_NAME',
+                            str(tmp_path / 'missing' / 'state.json'))
+        monkeypatch.setattr(homework, 'get_api_answer', lambda timestamp: {
+            'homeworks': [], 'current_date': 2000,
+        })
+        state = {'last_timestamp': 1000}
+        homework.poll_cycle(state, SimulatedClock(start=1000))
+        assert state['last_timestamp'] == 2000
+        assert 'Не удалось сохранить контрольную точку' in caplog.text
@@ -0,0 +1,89 @@
+import signal
+import time
+
+from clock import Scheduler, SimulatedClock, SystemClock
+
+WEEK = 7 * 24 * 60 * 60
+
+
+class TestClock:
+
+    def test_week_of_many_tenants(self):
+        clock = SimulatedClock(start=1000)
+        scheduler = Scheduler(clock)
+        cycles = {}
+
+        def cycle(tenant):
+            cycles[tenant] = cycles.get(tenant, 0) + 1
+
+        for tenant in range(100):
+            scheduler.every(600, cycle, tenant, start=1000 + tenant)
+
+        started = time.perf_counter()
+        scheduler.run(until=1000 + WEEK - 1)
+        elapsed = time.perf_counter() - started
+
+        assert set(cycles.values()) == {WEEK // 600}
+        assert elapsed < 1, (
+            f'Неделя симулированного опроса заняла {elapsed:.2f} с'
+        )
+
+    def test_stop(self):
+        clock = SimulatedClock()
+        scheduler = Scheduler(clock)
+        runs = []
+
+        def cycle():
+            runs.append(clock.time())
+            if len(runs) == 3:
+                scheduler.stop()
+
+        scheduler.every(600, cycle)
+        scheduler.run()
+        assert runs == [0, 600, 1200]
+
+    def test_wake_from_signal_handler(self):
+        clock = SystemClock()
+        previous = signal.signal(signal.SIGALRM,
+                                 lambda signum, frame: clock.wake())
+        signal.setitimer(signal.ITIMER_REAL, 0.05)
+        try:
+            started = time.monotonic()
+            clock.sleep(5)
+            elapsed = time.monotonic() - started
+        finally:
+            signal.signal(signal.SIGALRM, previous)
+        assert elapsed < 1, (
+            'Сигнал должен прерывать ожидание SystemClock.sleep()'
+        )
+
+    def test_poll_cycle_cursor(self, monkeypatch, memory_checkpoints):
+        import homework
+
+        clock = SimulatedClock(start=1000)
+        skew = 300  # API clock is behind the local one
+        requested = []
+
+        def mock_get_api_answer(last_timestamp):
+            requested.append(last_timestamp)
+            if len(requested) % 10 == 0:
+                raise ValueError('API недоступен')
+            return {'homeworks': [], 'current_date': int(clock.time()) - skew}
+
+        monkeypatch.setattr(homework, 'get_api_answer', mock_get_api_answer)
+        scheduler = Scheduler(clock)
+        state = {'last_timestamp': 0, 'stopped_at': 900}
+        scheduler.every(homework.RETRY_TIME, homework.poll_cycle,
+                        state, clock)
+        scheduler.run(until=1000 + WEEK)
+
+        overlap = homework.CURSOR_OVERLAP
+        assert len(requested) == WEEK // homework.RETRY_TIME + 1
+        assert requested[:2] == [0, 1000 - skew - overlap], (
+            'Курсор должен следовать времени API из current_date'
+        )
+        assert requested[10] == requested[9] == (
+            1000 + 8 * 600 - skew - overlap
+        ), 'После сбоя курсор не должен сдвигаться'
+        assert 'stopped_at' not in state
+        assert state['last_timestamp'] == 1000 + WEEK - skew
@@ -0,0 +1,145 @@
+from clock import Scheduler, SimulatedClock
+from events import CallbackSink, EventBus
+from history import parse_date
+
+
+def make_homework(number):
+    return {
+        'homework_name': f'hw{number}',
+        'status': 'approved',
+        'date_updated': f'2022-02-01T10:{number:02d}:00Z',
+    }
+
+
+class TestCursor:
+
+    def setup_homework(self, monkeypatch, homeworks):
+        import homework
+
+        sent = []
+        bus = EventBus()
+        bus.add(CallbackSink('test', sent.append))
+        monkeypatch.setattr(homework, 'EVENTS', bus)
+        requested = []
+
+        def mock_get_api_answer(last_timestamp):
+            requested.append(last_timestamp)
+            return {
+                'homeworks': list(homeworks),
+                'current_date': 1700000000,
+            }
+
+        monkeypatch.setattr(homework, 'get_api_answer', mock_get_api_answer)
+        return homework, bus, sent, requested
+
+    def test_overlap_dedup(self, monkeypatch, memory_checkpoints,
+                           status_store):
+        homeworks = [make_homework(1)]
+        homework, bus, sent, requested = self.setup_homework(
+            monkeypatch, homeworks
+        )
+        state = {'last_timestamp': 1000}
+        clock = SimulatedClock()
+        homework.poll_cycle(state, clock)
+        homeworks.append(make_homework(2))
+        homework.poll_cycle(state, clock)
+        bus.close(timeout=5)
+
+        assert requested == [
+            1000 - homework.CURSOR_OVERLAP,
+            1700000000 - homework.CURSOR_OVERLAP,
+        ]
+        assert [event['homework_name'] for event in sent] == [
+            'hw1', 'hw2'
+        ], 'Записи из окна перекрытия не должны отправляться повторно'
+
+    def test_catch_up_pages(self, monkeypatch, memory_checkpoints,
+                            status_store):
+        homeworks = [make_homework(number) for number in range(50, 0, -1)]
+        homework, bus, sent, requested = self.setup_homework(
+            monkeypatch, homeworks
+        )
+        monkeypatch.setattr(homework, 'CATCH_UP_CHUNK', 20)
+        monkeypatch.setattr(homework, 'CATCH_UP_PAGES', 2)
+        state = {'last_timestamp': 1000}  # saved before a long downtime
+        clock = SimulatedClock()
+
+        homework.poll_cycle(state, clock)
+        assert len(requested) == 1, (
+            'Ответ API должен запрашиваться один раз за цикл'
+        )
+        assert state['last_timestamp'] == parse_date(
+            make_homework(40)['date_updated']
+        ), ('Пока история не обработана, курсор не должен '
+            'переходить к current_date')
+        homework.poll_cycle(state, clock)
+        bus.close(timeout=5)
+
+        assert len(requested) == 2
+        assert state['last_timestamp'] == 1700000000
+        assert [event['homework_name'] for event in sent] == [
+            f'hw{number}' for number in range(1, 51)
+        ], 'Записи должны обрабатываться по порядку и без повторов'
+
+    def test_first_run_without_cursor(self, monkeypatch, memory_checkpoints,
+                                      status_store):
+        homeworks = [make_homework(number) for number in range(60)]
+        homework, bus, sent, requested = self.setup_homework(
+            monkeypatch, homeworks
+        )
+        state = {'last_timestamp': 0}
+        homework.poll_cycle(state, SimulatedClock())
+        homework.poll_cycle(state, SimulatedClock())
+        bus.close(timeout=5)
+
+        assert [event['homework_name'] for event in sent] == ['hw59'], (
+            'Без сохранённого курсора отправляется только последний статус'
+        )
+        assert len(homework.HISTORY) == 60
+        assert state['last_timestamp'] == 1700000000
+        assert len(requested) == 2
+
+    def test_stop_between_pages(self, monkeypatch, memory_checkpoints,
+                                status_store):
+        homeworks = [make_homework(number) for number in range(1, 51)]
+        homework, bus, sent, requested = self.setup_homework(
+            monkeypatch, homeworks
+        )
+        clock = SimulatedClock()
+        scheduler = Scheduler(clock)
+        cursors = []
+
+        def mock_save_checkpoint(path, state):
+            cursors.append(state['last_timestamp'])
+            scheduler.stop()  # SIGTERM arrives during the first page
+
+        monkeypatch.setattr(homework, 'save_checkpoint',
+                            mock_save_checkpoint)
+        state = {'last_timestamp': 1000}
+        scheduler.every(600, homework.poll_cycle, state, clock, None,
+                        scheduler)
+        scheduler.run()
+        bus.close(timeout=5)
+
+        assert [event['homework_name'] for event in sent] == [
+            f'hw{number}' for number in range(1, 21)
+        ], 'После остановки бота следующие страницы не обрабатываются'
+        assert cursors[0] == parse_date(make_homework(20)['date_updated']), (
+            'Контрольная точка сохраняется после каждой страницы'
+        )
+
+    def test_repeated_status_not_sent(self, monkeypatch, memory_checkpoints,
+                                      status_store):
+        homeworks = [make_homework(1)]
+        homework, bus, sent, requested = self.setup_homework(
+            monkeypatch, homeworks
+        )
+        state = {'last_timestamp': 1000}
+        homework.poll_cycle(state, SimulatedClock())
+        homeworks[0] = dict(homeworks[0], date_updated='2022-02-02T10:00:00Z')
+        homework.poll_cycle(state, SimulatedClock())
+        bus.close(timeout=5)
+
+        assert [event['homework_name'] for event in sent] == ['hw1'], (
+            'Статус, уже сохранённый в истории, не отправляется повторно'
+        )
@@ -0,0 +1,149 @@
+import json
+import threading
+import time
+
+import events
+from events import (DROP_NEW, DROP_OLDEST, SPILL, CallbackSink, EventBus,
+                    FileSink)
+
+
+class TestEvents:
+
+    def test_slow_sink_does_not_block(self, tmp_path):
+        release = threading.Event()
+        received = []
+
+        def slow(event):
+            release.wait()
+            received.append(event['number'])
+
+        bus = EventBus()
+        bus.add(CallbackSink('slow', slow), maxsize=2, policy=DROP_OLDEST)
+        bus.add(FileSink(str(tmp_path / 'events.jsonl')), maxsize=100)
+
+        started = time.perf_counter()
+        for number in range(10):
+            bus.publish({'number': number})
+        assert time.perf_counter() - started < 0.5, (
+            'Публикация событий не должна ждать медленный обработчик'
+        )
+        release.set()
+        metrics = bus.metrics()
+        bus.close(timeout=5)
+
+        assert received[-2:] == [8, 9]
+        assert metrics['slow']['dropped'] >= 7
+        lines = (tmp_path / 'events.jsonl').read_text().splitlines()
+        assert [json.loads(line)['number'] for line in lines] == list(
+            range(10)
+        )
+
+    def test_drop_new(self):
+        release = threading.Event()
+        received = []
+
+        def slow(event):
+            release.wait()
+            received.append(event['number'])
+
+        bus = EventBus()
+        bus.add(CallbackSink('slow', slow), maxsize=1, policy=DROP_NEW)
+        for number in range(5):
+            bus.publish({'number': number})
+            time.sleep(0.01)
+        release.set()
+        bus.close(timeout=5)
+        assert received == [0, 1]
+
+    def test_spill(self, tmp_path):
+        release = threading.Event()
+        received = []
+
+        def slow(event):
+            release.wait()
+            received.append(event['number'])
+
+        bus = EventBus()
+        bus.add(CallbackSink('slow', slow), maxsize=1, policy=SPILL,
+                spill_path=str(tmp_path / 'spill.jsonl'))
+        for number in range(5):
+            bus.publish({'number': number})
+        metrics = bus.metrics()['slow']
+        release.set()
+        for number in range(5, 10):
+            bus.publish({'number': number})
+        bus.close(timeout=5)
+
+        assert metrics['spilled'] >= 3
+        assert received == list(range(10)), (
+            'События из файла переполнения должны быть доставлены '
+            'раньше опубликованных позже'
+        )
+        assert not (tmp_path / 'spill.jsonl').exists()
+
+    def test_spill_retries_failed(self, monkeypatch, tmp_path):
+        monkeypatch.setattr(events, 'SPILL_RETRY', 0)
+        monkeypatch.setattr(events, 'SPILL_CHECK', 0.01)
+        failures = [ValueError('сбой')] * 3
+        received = []
+
+        def flaky(event):
+            if failures:
+                raise failures.pop()
+            received.append(event['number'])
+
+        bus = EventBus()
+        bus.add(CallbackSink('flaky', flaky), maxsize=2, policy=SPILL,
+                spill_path=str(tmp_path / 'spill.jsonl'))
+        for number in range(5):
+            bus.publish({'number': number})
+        worker = bus.workers[0]
+        deadline = time.perf_counter() + 5
+        while len(received) < 5 and time.perf_counter() < deadline:
+            time.sleep(0.01)
+        bus.close(timeout=5)
+
+        assert received == list(range(5)), (
+            'Неотправленные события должны повторяться в исходном порядке'
+        )
+        assert worker.metrics()['failed'] == 3
+
+    def test_close_shares_deadline(self, tmp_path):
+        release = threading.Event()
+
+        def stuck(event):
+            release.wait()
+
+        bus = EventBus()
+        for name in ('first', 'second'):
+            bus.add(CallbackSink(name, stuck), maxsize=10, policy=SPILL,
+                    spill_path=str(tmp_path / f'{name}.jsonl'))
+        for number in range(3):
+            bus.publish({'number': number})
+
+        started = time.perf_counter()
+        bus.close(timeout=0.5)
+        elapsed = time.perf_counter() - started
+        saved = {
+            name: (tmp_path / f'{name}.jsonl').read_text().splitlines()
+            for name in ('first', 'second')
+        }
+        release.set()
+
+        assert elapsed < 1, 'Время остановки общее для всех обработчиков'
+        for lines in saved.values():
+            assert [json.loads(line)[1]['number'] for line in lines] == [
+                0, 1, 2
+            ], 'Недоставленные события должны сохраниться в файл'
+
+    def test_failed_sink(self):
+        def broken(event):
+            raise ValueError('сбой')
+
+        bus = EventBus()
+        bus.add(CallbackSink('broken', broken))
+        bus.publish({})
+        worker = bus.workers[0]
+        bus.close(timeout=5)
+        assert worker.metrics()['failed'] == 1
+        assert 'latency_p50' in worker.metrics()
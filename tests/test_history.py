@@ -0,0 +1,69 @@
+from history import StatusHistory
+
+
+class TestHistory:
+
+    def test_record_only_transitions(self, tmp_path):
+        history = StatusHistory(str(tmp_path / 'history.jsonl'))
+        homework = {
+            'homework_name': 'hw1',
+            'status': 'reviewing',
+            'date_updated': '2022-02-13T14:40:57Z',
+        }
+        assert history.record(homework)
+        assert not history.record(homework), (
+            'Повторный статус не должен попадать в историю'
+        )
+        homework['status'] = 'approved'
+        homework['date_updated'] = '2022-02-14T10:00:00Z'
+        assert history.record(homework)
+        assert len(history) == 2
+
+    def test_index_survives_restart(self, tmp_path):
+        path = str(tmp_path / 'history.jsonl')
+        history = StatusHistory(path)
+        for day, name in enumerate(['hw1', 'hw2', 'hw1'], start=10):
+            history.record({
+                'homework_name': name,
+                'status': 'approved' if day == 12 else 'reviewing',
+                'date_updated': f'2022-02-{day}T12:00:00Z',
+            })
+
+        history = StatusHistory(path)
+        records = history.for_homework('hw1')
+        assert [record['s'] for record in records] == [
+            'reviewing', 'approved'
+        ]
+        assert [record['n'] for record in history.latest(2)] == [
+            'hw2', 'hw1'
+        ]
+        start = records[0]['t'] + 1
+        assert [record['n'] for record in history.between(
+            start, records[-1]['t'])] == ['hw2', 'hw1']
+        assert not history.record({
+            'homework_name': 'hw1', 'status': 'approved'
+        }), 'После перезапуска последний статус должен восстанавливаться'
+
+    def test_torn_last_line(self, tmp_path):
+        path = tmp_path / 'history.jsonl'
+        path.write_bytes(
+            b'{"n":"hw1","s":"reviewing","t":1}\n{"n":"hw1","s":"appr'
+        )
+        history = StatusHistory(str(path))
+        assert len(history) == 1
+        history.record({'homework_name': 'hw2', 'status': 'approved',
+                        'date_updated': '2022-02-14T10:00:00Z'})
+
+        history = StatusHistory(str(path))
+        assert len(history) == 2, (
+            'Запись после оборванной строки не должна теряться'
+        )
+        assert history.last_status == {'hw1': 'reviewing', 'hw2': 'approved'}
+
+    def test_unterminated_last_line(self, tmp_path):
+        path = tmp_path / 'history.jsonl'
+        path.write_bytes(b'{"n":"hw1","s":"reviewing","t":1}')
+        history = StatusHistory(str(path))
+        history.record({'homework_name': 'hw2', 'status': 'approved',
+                        'date_updated': '2022-02-14T10:00:00Z'})
+        assert len(StatusHistory(str(path))) == 2
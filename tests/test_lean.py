@@ -0,0 +1,110 @@
+import threading
+import time
+from types import SimpleNamespace
+
+from clock import Scheduler, SimulatedClock
+from lean import InlineUpdatesClock
+from lease import SQLiteLease
+
+
+class MockBot:
+
+    def __init__(self):
+        self.batches = [[SimpleNamespace(update_id=7),
+                         SimpleNamespace(update_id=8)]]
+        self.offsets = []
+
+    def get_updates(self, offset=None, timeout=0, **kwargs):
+        self.offsets.append(offset)
+        return self.batches.pop() if self.batches else []
+
+
+class MockDispatcher:
+
+    def __init__(self):
+        self.processed = []
+
+    def process_update(self, update):
+        self.processed.append(update.update_id)
+
+
+class TestLean:
+
+    def test_updates_handled_inline(self):
+        bot = MockBot()
+        dispatcher = MockDispatcher()
+        clock = InlineUpdatesClock(bot, dispatcher)
+        threads = threading.active_count()
+
+        clock.sleep(0.01)
+        assert not bot.offsets, (
+            'До start_polling() обновления не должны запрашиваться'
+        )
+        clock.start_polling()
+        clock.sleep(0.05)
+
+        assert dispatcher.processed == [7, 8]
+        assert bot.offsets[:2] == [None, 9], (
+            'Проверьте, что обработанные обновления подтверждаются offset'
+        )
+        assert threading.active_count() == threads
+
+    def test_wake(self):
+        clock = InlineUpdatesClock(MockBot(), MockDispatcher())
+        clock.start_polling()
+        clock.wake()
+        clock.sleep(60)
+
+    def test_short_sleep_does_not_spin(self):
+        bot = MockBot()
+        bot.batches = []
+        timeouts = []
+
+        def get_updates(offset=None, timeout=0, **kwargs):
+            timeouts.append(timeout)
+            time.sleep(timeout)  # Telegram holds the request open
+            return []
+
+        bot.get_updates = get_updates
+        clock = InlineUpdatesClock(bot, MockDispatcher())
+        clock.start_polling()
+        clock.sleep(0.2)
+        assert timeouts == [1], (
+            'Ожидание меньше секунды должно округляться вверх'
+        )
+
+    def test_main_with_injected_clock(self, monkeypatch, tmp_path,
+                                      memory_checkpoints, status_store):
+        import homework
+        from events import EventBus
+
+        class HourScheduler(Scheduler):
+            def run(self, until=None):
+                super().run(until=self.clock.time() + 60 * 60)
+
+        requested = []
+
+        def mock_get_api_answer(last_timestamp):
+            requested.append(last_timestamp)
+            return {'homeworks': [], 'current_date': 1700000000}
+
+        monkeypatch.setattr(homework, 'LEAN_MODE', True)
+        monkeypatch.setattr(homework, 'Scheduler', HourScheduler)
+        monkeypatch.setattr(homework, 'EVENTS', EventBus())
+        monkeypatch.setattr(homework, 'get_api_answer', mock_get_api_answer)
+        monkeypatch.setattr(homework, 'signal', SimpleNamespace(
+            signal=lambda signum, handler: None, SIGTERM=15, SIGINT=2,
+        ))
+        for name in ('LEASE_NAME', 'SPILL_NAME'):
+            monkeypatch.setattr(homework, name, str(tmp_path / name))
+
+        homework.main(SimulatedClock(start=1000))
+
+        assert len(requested) == 1 + 6, (  # on takeover and every 600 s
+            'Внедрённые часы в режиме LEAN_MODE должны вести цикл опроса'
+        )
+        saved = memory_checkpoints[homework.CHECKPOINT_NAME]
+        assert saved['stopped_at'] == 1000 + 60 * 60
+        other = SQLiteLease(str(tmp_path / 'LEASE_NAME'), 'other',
+                            clock=SimulatedClock(start=1000 + 60 * 60))
+        assert other.acquire(), 'При остановке аренда освобождается'
@@ -0,0 +1,156 @@
+from types import SimpleNamespace
+
+from clock import Scheduler, SimulatedClock
+from history import StatusHistory
+from lease import SQLiteLease
+from stats import TransitionStore
+
+
+class MockReceiver:
+
+    def __init__(self):
+        self.polling = False
+
+    def start_polling(self, **kwargs):
+        self.polling = True
+
+    def stop(self):
+        self.polling = False
+
+
+class TestLease:
+
+    def test_single_owner(self, tmp_path):
+        path = str(tmp_path / 'lease.sqlite')
+        clock = SimulatedClock(start=1000)
+        web = SQLiteLease(path, 'web', ttl=30, clock=clock)
+        worker = SQLiteLease(path, 'worker', ttl=30, clock=clock)
+
+        assert web.acquire()
+        assert not worker.acquire(), (
+            'Аренду не может держать больше одного процесса'
+        )
+        clock.sleep(20)
+        assert web.acquire(), 'Владелец должен продлевать аренду'
+        clock.sleep(20)
+        assert not worker.acquire()
+
+        clock.sleep(15)  # web stopped renewing, lease expired 5 s ago
+        assert not web.valid()
+        assert worker.acquire()
+        assert worker.last_failover == 5
+        assert not web.acquire()
+
+        worker.release()
+        assert web.acquire(), (
+            'После освобождения аренду можно получить сразу'
+        )
+
+    def test_failover(self, monkeypatch, tmp_path, memory_checkpoints,
+                      status_store):
+        import homework
+
+        clock = SimulatedClock(start=1000)
+        requested = []
+
+        def mock_get_api_answer(last_timestamp):
+            requested.append(last_timestamp)
+            return {
+                'homeworks': [{
+                    'homework_name': 'hw1',
+                    'status': 'reviewing',
+                    'date_updated': '2022-02-01T10:00:00Z',
+                }] if len(requested) == 1 else [],
+                'current_date': int(clock.time()),
+            }
+
+        monkeypatch.setattr(homework, 'get_api_answer', mock_get_api_answer)
+        path = str(tmp_path / 'lease.sqlite')
+        processes = [
+            (SQLiteLease(path, name, ttl=30, clock=clock), MockReceiver(),
+             {'last_timestamp': 0})
+            for name in ('web', 'worker')
+        ]
+        for lease, receiver, state in processes:
+            homework.keep_lease(lease, receiver, state, clock)
+        (web, web_receiver, _), (worker, worker_receiver, state) = processes
+        assert web_receiver.polling and not worker_receiver.polling
+        assert requested == [0]
+
+        clock.sleep(40)  # web died without releasing the lease
+        # the worker has not seen the history written by web
+        monkeypatch.setattr(homework, 'HISTORY',
+                            StatusHistory(str(tmp_path / 'stale.jsonl')))
+        monkeypatch.setattr(homework, 'STATS', TransitionStore())
+        homework.keep_lease(worker, worker_receiver, state, clock)
+        assert worker_receiver.polling
+        assert worker.last_failover == 10
+        assert requested == [0, 1000 - homework.CURSOR_OVERLAP], (
+            'Новый владелец должен продолжить с сохранённого курсора'
+        )
+        assert len(homework.HISTORY) == len(homework.STATS) == 1, (
+            'Новый владелец должен загрузить историю статусов'
+        )
+
+        homework.keep_lease(web, web_receiver, {'last_timestamp': 0}, clock)
+        assert not web_receiver.polling
+        homework.lead_cycle(web, web_receiver, state, clock)
+        assert len(requested) == 2
+
+    def test_lease_lost_during_cycle(self, monkeypatch, tmp_path,
+                                     memory_checkpoints, status_store):
+        import homework
+
+        clock = SimulatedClock(start=1000)
+        path = str(tmp_path / 'lease.sqlite')
+        web = SQLiteLease(path, 'web', ttl=30, clock=clock)
+        worker = SQLiteLease(path, 'worker', ttl=30, clock=clock)
+        receiver = MockReceiver()
+        requested = []
+
+        def mock_get_api_answer(last_timestamp):
+            requested.append(last_timestamp)
+            clock.sleep(40)  # the request hung past the lease TTL
+            assert worker.acquire()
+            return {
+                'homeworks': [
+                    {'homework_name': f'hw{number}', 'status': 'approved',
+                     'date_updated': f'2022-02-01T10:{number:02d}:00Z'}
+                    for number in range(homework.CATCH_UP_CHUNK * 2)
+                ],
+                'current_date': int(clock.time()),
+            }
+
+        monkeypatch.setattr(homework, 'get_api_answer', mock_get_api_answer)
+        assert web.acquire()
+        receiver.start_polling()
+        homework.lead_cycle(web, receiver, {'last_timestamp': 1000}, clock)
+
+        assert len(requested) == 1
+        assert len(homework.HISTORY) == homework.CATCH_UP_CHUNK, (
+            'Цикл опроса должен прерваться после потери аренды'
+        )
+        assert not receiver.polling
+
+    def test_web_process_never_polls(self, monkeypatch, tmp_path):
+        import homework
+
+        class HourScheduler(Scheduler):
+            def run(self, until=None):
+                super().run(until=self.clock.time() + 60 * 60)
+
+        def mock_get_api_answer(last_timestamp):
+            raise AssertionError('web-процесс не должен опрашивать API')
+
+        monkeypatch.setattr(homework, 'PORT', '0')
+        monkeypatch.setattr(homework, 'LEASE_NAME',
+                            str(tmp_path / 'lease.sqlite'))
+        monkeypatch.setattr(homework, 'Scheduler', HourScheduler)
+        monkeypatch.setattr(homework, 'get_api_answer', mock_get_api_answer)
+        monkeypatch.setattr(homework, 'signal', SimpleNamespace(
+            signal=lambda signum, handler: None, SIGTERM=15, SIGINT=2,
+        ))
+        homework.main(SimulatedClock(start=1000))
+        assert not (tmp_path / 'lease.sqlite').exists(), (
+            'web-процесс не должен участвовать в аренде опроса'
+        )
@@ -0,0 +1,85 @@
+import logging
+
+from clock import Scheduler, SimulatedClock
+from loggers import logger
+from memwatch import MemoryMonitor, Trend
+
+
+class TestMemwatch:
+
+    def test_trend(self):
+        trend = Trend(window=4)
+        assert trend.slope() == 0
+        for value in (100, 5, 7, 9, 11):
+            trend.append(value)
+        assert list(trend.samples) == [5, 7, 9, 11]
+        assert trend.slope() == 2
+        trend.append(0)
+        assert trend.slope() == -1.9
+
+    def test_poll_cycles_bounded(self, monkeypatch, caplog,
+                                 memory_checkpoints, status_store):
+        import homework
+
+        # captured log records would be the only thing growing
+        caplog.set_level(logging.WARNING, logger=logger.name)
+
+        def mock_get_api_answer(last_timestamp):
+            return {
+                'homeworks': [{
+                    'homework_name': 'hw1',
+                    'status': 'reviewing',
+                    'date_updated': '2022-02-13T14:40:57Z',
+                }],
+                'current_date': last_timestamp,
+            }
+
+        monkeypatch.setattr(homework, 'get_api_answer', mock_get_api_answer)
+        clock = SimulatedClock(start=1000)
+        scheduler = Scheduler(clock)
+        state = {'last_timestamp': 0}
+        monitor = MemoryMonitor(threshold=256 * 1024, window=500)
+        monitor.start()
+        try:
+            scheduler.every(600, homework.poll_cycle, state, clock)
+            scheduler.every(600, monitor.sample)
+            scheduler.run(until=1000 + 600 * 1999)
+            traced_growth, _ = monitor.growth()
+        finally:
+            monitor.stop()
+
+        assert len(monitor.traced) == 500
+        assert not monitor.leaking, (
+            f'Память растёт на {traced_growth:.0f} Б за 500 циклов'
+        )
+
+    def test_leak_detected(self):
+        leak = []
+        monitor = MemoryMonitor(threshold=64 * 1024, window=20)
+        monitor.start()
+        try:
+            for _ in range(20):
+                leak.append(bytearray(16 * 1024))
+                monitor.sample()
+        finally:
+            monitor.stop()
+        assert monitor.leaking, 'Рост памяти должен обнаруживаться'
+
+    def test_reports_skipped_above_debug(self, monkeypatch, caplog,
+                                         memory_checkpoints, status_store):
+        import homework
+
+        reports = []
+        monkeypatch.setattr(homework, 'report_resources', reports.append)
+        monkeypatch.setattr(homework, 'get_api_answer', lambda timestamp: {
+            'homeworks': [], 'current_date': 2000,
+        })
+        state = {'last_timestamp': 1000}
+        caplog.set_level(logging.INFO, logger=logger.name)
+        homework.poll_cycle(state, SimulatedClock())
+        assert not reports, (
+            'Отчёты о ресурсах собираются только при уровне DEBUG'
+        )
+        caplog.set_level(logging.DEBUG, logger=logger.name)
+        homework.poll_cycle(state, SimulatedClock())
+        assert len(reports) == 1
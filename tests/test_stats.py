@@ -0,0 +1,86 @@
+import threading
+import time
+
+import numpy as np
+
+from stats import TransitionStore
+
+
+class TestStats:
+
+    def test_summary(self):
+        store = TransitionStore(capacity=2)
+        transitions = [
+            ('hw1', 'reviewing', 100),
+            ('hw2', 'reviewing', 150),
+            ('hw1', 'rejected', 400),
+            ('hw1', 'reviewing', 500),
+            ('hw2', 'approved', 350),
+            ('hw1', 'approved', 600),
+            ('hw3', 'approved', 700),
+            ('hw3', 'unknown', 800),
+        ]
+        for transition in transitions:
+            store.append(*transition)
+        assert len(store) == 7, (
+            'Переходы в недокументированный статус не должны сохраняться'
+        )
+
+        summary = store.summary(percentiles=(50, 100))
+        assert summary['all'] == {
+            'reviews': 3,
+            'percentiles': [200, 300],
+            'rejection_rate': 1 / 3,
+        }
+        assert summary['projects']['hw1'] == {
+            'reviews': 2,
+            'percentiles': [100, 300],
+            'rejection_rate': 0.5,
+        }
+        assert 'hw3' not in summary['projects']
+
+    def test_summary_empty(self):
+        summary = TransitionStore().summary()
+        assert summary['all']['reviews'] == 0
+        assert summary['projects'] == {}
+
+    def test_summary_while_appending(self):
+        store = TransitionStore(capacity=1)
+
+        def append():
+            for number in range(20000):
+                store.append(f'hw{number}', 'reviewing', number * 1000)
+                store.append(f'hw{number}', 'approved', number * 1000 + 100)
+
+        writer = threading.Thread(target=append)
+        writer.start()
+        summaries = []
+        while writer.is_alive():
+            summaries.append(store.summary(percentiles=(0, 100))['all'])
+        writer.join()
+        for summary in summaries:
+            if summary['reviews']:
+                assert summary['percentiles'] == [100, 100], (
+                    'Статистика должна читать согласованный срез столбцов'
+                )
+
+    def test_million_transitions(self):
+        store = TransitionStore()
+        size = 1000000
+        random = np.random.default_rng(0)
+        for number in range(10000):
+            store.code(f'hw{number}')
+        store.extend(
+            random.integers(0, 10000, size),
+            random.integers(0, 3, size),
+            random.integers(0, 10 ** 8, size),
+        )
+
+        started = time.perf_counter()
+        summary = store.summary()
+        elapsed = time.perf_counter() - started
+
+        assert summary['all']['reviews'] > 0
+        assert elapsed < 1, (
+            f'Статистика по {size} переходам считалась {elapsed:.2f} с'
+        )
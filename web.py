@@ -0,0 +1,30 @@
+import json
+import threading
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def serve_status(port: int, status):
+    """Answer HTTP requests with status() as JSON in a background thread.
+
+    Return the server, call its shutdown() to stop it.
+    """
+    class StatusHandler(BaseHTTPRequestHandler):
+
+        def do_GET(self):
+            """Send the current status."""
+            body = json.dumps(status()).encode()
+            self.send_response(HTTPStatus.OK)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            """Do not write every request to stderr."""
+
+    server = ThreadingHTTPServer(('', port), StatusHandler)
+    threading.Thread(
+        target=server.serve_forever, name='http', daemon=True
+    ).start()
+    return server